@@ -0,0 +1,96 @@
+"""
+Benchmark analyze_portfolio against the original per-row loop.
+
+Run from backend/:
+    python benchmarks/bench_analyzer.py --lots 1000 10000 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from utils.analyzer import analyze_portfolio, analyze_portfolio_frame
+
+ASSET_TYPES = ["Stock", "Mutual Fund", "Crypto", "Bond", "ETF"]
+
+
+def make_portfolio(lots, seed=0):
+    rng = np.random.default_rng(seed)
+    invested = rng.integers(1000, 100000, size=lots).astype(float)
+    return pd.DataFrame({
+        "Asset": [f"ASSET{i % 500}" for i in range(lots)],
+        "Type": rng.choice(ASSET_TYPES, size=lots),
+        "Invested_Amount": invested,
+        "Current_Value": np.round(invested * rng.uniform(0.5, 1.8, size=lots), 2),
+    })
+
+
+def analyze_portfolio_loop(portfolio_data):
+    """The previous row-at-a-time implementation, kept as the baseline."""
+    total_invested = 0
+    total_current = 0
+    asset_type_summary = {}
+    detailed_assets = []
+    for item in portfolio_data:
+        invested = float(item['Invested_Amount'])
+        current = float(item['Current_Value'])
+        total_invested += invested
+        total_current += current
+        detailed_assets.append({**item, 'ROI (%)': round(((current - invested) / invested) * 100, 2)})
+        asset_type_summary[item['Type']] = asset_type_summary.get(item['Type'], 0) + current
+    diversification = [
+        {"Asset_Type": t, "Value": v, "Percentage": round((v / total_current) * 100, 2)}
+        for t, v in asset_type_summary.items()
+    ]
+    return {
+        "Total_Invested": total_invested,
+        "Total_Current": total_current,
+        "Total_Profit_Loss": total_current - total_invested,
+        "Portfolio_ROI (%)": round(((total_current - total_invested) / total_invested) * 100, 2),
+        "Asset_Diversification": diversification,
+        "Detailed_Assets": detailed_assets,
+    }
+
+
+def best_of(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lots", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("records: list-of-dicts input; frame: DataFrame input; aggregates: frame without Detailed_Assets rows")
+    print(f"{'lots':>8} {'loop (ms)':>11} {'records (ms)':>13} {'frame (ms)':>11} {'aggregates (ms)':>16} {'speedup':>8}")
+    for lots in args.lots:
+        frame = make_portfolio(lots)
+        records = frame.to_dict(orient='records')
+        loop_time, expected = best_of(lambda: analyze_portfolio_loop(records), args.repeat)
+        records_time, _ = best_of(lambda: analyze_portfolio(records), args.repeat)
+        frame_time, actual = best_of(lambda: analyze_portfolio_frame(frame), args.repeat)
+        aggregate_time, _ = best_of(lambda: analyze_portfolio_frame(frame, include_details=False), args.repeat)
+
+        assert abs(actual["Total_Current"] - expected["Total_Current"]) < 1e-6 * max(1.0, expected["Total_Current"])
+        assert actual["Portfolio_ROI (%)"] == expected["Portfolio_ROI (%)"]
+        assert [d["Asset_Type"] for d in actual["Asset_Diversification"]] == \
+            [d["Asset_Type"] for d in expected["Asset_Diversification"]]
+        assert actual["Detailed_Assets"][-1] == expected["Detailed_Assets"][-1]
+
+        print(f"{lots:>8} {loop_time * 1000:>11.2f} {records_time * 1000:>13.2f} "
+              f"{frame_time * 1000:>11.2f} {aggregate_time * 1000:>16.2f} {loop_time / frame_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
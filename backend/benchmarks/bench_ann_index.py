@@ -0,0 +1,104 @@
+"""
+Compare the news index types against exact flat search.
+
+Corpora are synthetic: unit vectors scattered around random topic centres,
+which clusters like sentence embeddings do. For every size and index type
+this reports build time, serialized index size, per-query latency and
+recall@k against the flat index's neighbours.
+
+Run from backend/:
+    python benchmarks/bench_ann_index.py --sizes 10000 100000 1000000
+    NEWS_INDEX_NPROBE=32 python benchmarks/bench_ann_index.py --types ivf ivfpq --json ann.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import faiss
+import numpy as np
+from utils.ann_index import INDEX_TYPES, build_index, factory_string
+
+
+def make_corpus(n, dim, topics, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dim)).astype('float32')
+    vectors = centres[rng.integers(0, topics, size=n)] + 0.6 * rng.standard_normal((n, dim)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def make_queries(corpus, count, seed=1):
+    rng = np.random.default_rng(seed)
+    queries = corpus[rng.integers(0, len(corpus), size=count)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape).astype('float32')
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def recall_at_k(found, truth):
+    hits = sum(len(set(row[row >= 0]) & set(expected)) for row, expected in zip(found, truth))
+    return hits / truth.size
+
+
+def bench_type(index_type, corpus, queries, truth, k):
+    start = time.perf_counter()
+    index = build_index(corpus, index_type)
+    build_time = time.perf_counter() - start
+    index_bytes = faiss.serialize_index(index).nbytes
+
+    # One query per call, as the API serves them
+    latencies = []
+    found = np.empty((len(queries), k), dtype='int64')
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - start)
+        found[i] = ids[0]
+    latencies = np.array(latencies) * 1000.0
+    return {
+        "type": index_type,
+        "factory": factory_string(index_type, corpus.shape[1], len(corpus)),
+        "build_sec": round(build_time, 3),
+        "index_mb": round(index_bytes / 2 ** 20, 2),
+        "query_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "query_p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "recall_at_k": round(recall_at_k(found, truth), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--dim", type=int, default=384, help="all-MiniLM-L6-v2 embeds to 384 dimensions")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'n':>9} {'type':>7} {'factory':>16} {'build (s)':>10} {'size (MB)':>10} "
+          f"{'p50 (ms)':>9} {'p99 (ms)':>9} {f'recall@{args.k}':>10}")
+    for n in args.sizes:
+        corpus = make_corpus(n, args.dim, args.topics)
+        queries = make_queries(corpus, args.queries)
+        exact = faiss.IndexFlatL2(args.dim)
+        exact.add(corpus)
+        _, truth = exact.search(queries, args.k)
+        for index_type in args.types:
+            row = {"n": n, **bench_type(index_type, corpus, queries, truth, args.k)}
+            results.append(row)
+            print(f"{n:>9} {row['type']:>7} {row['factory']:>16} {row['build_sec']:>10.2f} {row['index_mb']:>10.2f} "
+                  f"{row['query_p50_ms']:>9.3f} {row['query_p99_ms']:>9.3f} {row['recall_at_k']:>10.4f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"dim": args.dim, "k": args.k, "queries": args.queries, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
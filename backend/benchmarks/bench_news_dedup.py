@@ -0,0 +1,99 @@
+"""
+Measure how much near-duplicate collapsing shrinks the news corpus at ingest.
+
+A generated corpus with syndicated variants of its stories (see
+generators.make_news_variants) is appended to a fresh NewsStore with
+collapsing off and on. For each it reports articles stored, ingest time,
+the time to embed what was stored and the size of the resulting vectors,
+and, for a fixed query set, how many top-k slots go to a second copy of a
+story already in the results. Variants caught and distinct stories wrongly
+merged are checked against the generator's ground truth.
+
+Run from backend/:
+    python benchmarks/bench_news_dedup.py --articles 5000 --variant-rate 0.3
+    python benchmarks/bench_news_dedup.py --articles 20000 --no-embed
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import numpy as np
+from eval_encoders import make_queries, normalize
+from generators import make_news_corpus, make_news_variants
+from utils.news_dedup import NEWS_DEDUP_THRESHOLD
+from utils.news_store import NewsStore
+
+
+def ingest(articles, threshold, workdir):
+    store = NewsStore(os.path.join(workdir, f"news_store_{threshold}.db"), dedup_threshold=threshold)
+    start = time.perf_counter()
+    store.append(articles)
+    seconds = time.perf_counter() - start
+    stored = store.get_many([row["id"] for row in store.headlines()])
+    return stored, seconds, store.dedup_stats()
+
+
+def duplicate_slots(stored, article_vectors, query_vectors, k):
+    """Top-k results that repeat a story already ranked higher for the same query."""
+    scores = normalize(query_vectors) @ normalize(article_vectors).T
+    stories = np.array([article["story"] for article in stored], dtype=object)
+    repeated = 0
+    for row in np.argsort(-scores, axis=1)[:, :k]:
+        repeated += k - len(set(stories[row]))
+    return repeated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=5000, help="Original stories before variants")
+    parser.add_argument("--variant-rate", type=float, default=0.3, help="Variants per story, on average")
+    parser.add_argument("--threshold", type=float, default=NEWS_DEDUP_THRESHOLD or 0.8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--no-embed", action="store_true", help="Skip the embedding and top-k measurements")
+    args = parser.parse_args()
+
+    articles = make_news_variants(make_news_corpus(args.articles), rate=args.variant_rate)
+    variants = sum(article["story"] != article["guid"] for article in articles)
+    print(f"{len(articles)} articles: {args.articles} stories, {variants} syndicated variants")
+
+    encoder = None
+    if not args.no_embed:
+        from utils.encoders import NEWS_ENCODER, load_encoder
+        from utils.news_rag import EMBED_BATCH_SIZE, EMBED_MODEL_NAME
+        encoder = load_encoder(EMBED_MODEL_NAME, NEWS_ENCODER)
+        encoder.encode(["warm up"] * EMBED_BATCH_SIZE, batch_size=EMBED_BATCH_SIZE)
+        query_vectors = encoder.encode(make_queries(args.queries), batch_size=EMBED_BATCH_SIZE)
+
+    print(f"{'threshold':>9} {'stored':>7} {'ingest (s)':>11} {'embed (s)':>10} {'vectors (MB)':>13} "
+          f"{'dup slots':>10} {'variants caught':>16} {'stories merged':>15}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for threshold in (0.0, args.threshold):
+            stored, ingest_sec, stats = ingest(articles, threshold, workdir)
+            originals = sum(article["story"] == article["guid"] for article in stored)
+            caught = variants - (len(stored) - originals)
+
+            embed_sec = vectors_mb = slots = float("nan")
+            if encoder is not None:
+                texts = [f"{article.get('title', '')} {article.get('summary', '')}".strip() for article in stored]
+                start = time.perf_counter()
+                article_vectors = encoder.encode(texts, batch_size=EMBED_BATCH_SIZE)
+                embed_sec = time.perf_counter() - start
+                vectors_mb = article_vectors.astype("float32").nbytes / 1e6
+                slots = duplicate_slots(stored, article_vectors, query_vectors, args.k)
+
+            print(f"{threshold:>9.2f} {len(stored):>7} {ingest_sec:>11.3f} {embed_sec:>10.2f} {vectors_mb:>13.2f} "
+                  f"{slots:>10} {caught:>7}/{variants:<8} {args.articles - originals:>15}")
+            if threshold:
+                print(f"Corpus shrank {100 * (1 - len(stored) / len(articles)):.1f}% in articles and "
+                      f"{100 * (1 - stats['chars_out'] / max(1, stats['chars_in'])):.1f}% in text "
+                      f"({stats['duplicates']} near-duplicates, {stats['paragraphs']} repeated paragraphs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Measure cold-start costs: importing main, and time to the first news query.
+
+Each measurement runs in a fresh interpreter so nothing is already imported
+or loaded. The news store is a generated corpus in a temporary directory;
+the first run of a corpus builds the index, later runs reopen the persisted one.
+
+Run from backend/:
+    python benchmarks/bench_startup.py --runs 3 --news-articles 500
+    python benchmarks/bench_startup.py --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from generators import make_news_corpus
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start)
+"""
+
+# Starts the app (startup hooks included) and times the first and second search
+FIRST_QUERY_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import main
+from fastapi.testclient import TestClient
+imported = time.perf_counter() - start
+result = {"import_sec": imported}
+with TestClient(main.app) as client:
+    client.get("/api/health").raise_for_status()
+    result["health_sec"] = time.perf_counter() - start
+    if WAIT_READY:
+        while client.get("/api/ready").status_code == 503:
+            time.sleep(0.05)
+        result["ready_sec"] = time.perf_counter() - start
+    query_start = time.perf_counter()
+    client.get("/search-news/", params={"query": "Infosys earnings"}).raise_for_status()
+    result["first_query_sec"] = time.perf_counter() - query_start
+    result["time_to_first_result_sec"] = time.perf_counter() - start
+    query_start = time.perf_counter()
+    client.get("/search-news/", params={"query": "HDFC Bank dividend"}).raise_for_status()
+    result["second_query_sec"] = time.perf_counter() - query_start
+print(json.dumps(result))
+"""
+
+
+def run_python(script, env):
+    completed = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env,
+                               capture_output=True, text=True, check=True)
+    return completed.stdout.strip().splitlines()[-1]
+
+
+def median_of(samples):
+    return {key: round(statistics.median(sample[key] for sample in samples), 3) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--news-articles", type=int, default=500)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {**os.environ, "NEWS_STORE_PATH": os.path.join(workdir, "news_store.db"), "NEWS_FEEDS": ""}
+        subprocess.run(
+            [sys.executable, "-c",
+             "import json, sys; from utils.news_store import NewsStore; "
+             "NewsStore().append(json.load(sys.stdin))"],
+            cwd=BACKEND_DIR, env=env, input=json.dumps(make_news_corpus(args.news_articles)), text=True, check=True,
+        )
+
+        imports = [float(run_python(IMPORT_SCRIPT, env)) for _ in range(args.runs)]
+        report["import_main_sec"] = round(statistics.median(imports), 3)
+        print(f"import main: {report['import_main_sec']:.3f}s (median of {args.runs})")
+
+        # The first run builds and persists the index; the rest reopen it like a restarted worker
+        cold = json.loads(run_python("WAIT_READY = False\n" + FIRST_QUERY_SCRIPT, env))
+        report["first_start_build"] = {key: round(value, 3) for key, value in cold.items()}
+        print(f"first start (index build): {json.dumps(report['first_start_build'])}")
+
+        lazy = [json.loads(run_python("WAIT_READY = False\n" + FIRST_QUERY_SCRIPT, {**env, "NEWS_WARMUP": "false"}))
+                for _ in range(args.runs)]
+        report["restart_lazy"] = median_of(lazy)
+        print(f"restart, no warm-up: {json.dumps(report['restart_lazy'])}")
+
+        warm = [json.loads(run_python("WAIT_READY = True\n" + FIRST_QUERY_SCRIPT, {**env, "NEWS_WARMUP": "true"}))
+                for _ in range(args.runs)]
+        report["restart_warmup"] = median_of(warm)
+        print(f"restart, warm-up then /api/ready: {json.dumps(report['restart_warmup'])}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compare encoder backends (torch, int8, onnx) against the full-precision model.
+
+For each backend this reports encode throughput on a generated news corpus,
+single-query latency, mean cosine similarity of its article vectors to the
+torch ones, and the overlap of its top-k results with torch's top-k for a
+fixed query set (exact inner-product search, so only the encoder differs).
+Backends that cannot load here (e.g. onnx without onnxruntime) are skipped.
+
+Run from backend/:
+    python benchmarks/eval_encoders.py --articles 2000 --queries 200 -k 5
+    python benchmarks/eval_encoders.py --backends torch int8 --json encoders.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import numpy as np
+from generators import COMPANIES, make_news_corpus
+from utils.encoders import ENCODER_BACKENDS, load_encoder
+from utils.news_rag import EMBED_BATCH_SIZE, EMBED_MODEL_NAME
+
+QUERY_TEMPLATES = ("{} quarterly earnings", "{} share price outlook", "regulator action against {}",
+                   "{} dividend announcement", "{} expansion plans")
+
+
+def make_queries(count, seed=7):
+    rng = np.random.default_rng(seed)
+    return [QUERY_TEMPLATES[rng.integers(len(QUERY_TEMPLATES))].format(COMPANIES[rng.integers(len(COMPANIES))][0])
+            for _ in range(count)]
+
+
+def normalize(vectors):
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def top_k(article_vectors, query_vectors, k):
+    scores = normalize(query_vectors) @ normalize(article_vectors).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def evaluate(backend, texts, queries, batch_size, k):
+    start = time.perf_counter()
+    encoder = load_encoder(EMBED_MODEL_NAME, backend)
+    load_sec = time.perf_counter() - start
+    encoder.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+
+    start = time.perf_counter()
+    article_vectors = encoder.encode(texts, batch_size=batch_size)
+    encode_sec = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        encoder.encode([query], batch_size=1)
+        latencies.append(time.perf_counter() - start)
+    query_vectors = encoder.encode(queries, batch_size=batch_size)
+
+    return {
+        "name": encoder.name,
+        "load_sec": round(load_sec, 3),
+        "articles_per_sec": round(len(texts) / encode_sec, 1),
+        "query_p50_ms": round(float(np.percentile(np.array(latencies) * 1000.0, 50)), 3),
+    }, article_vectors, query_vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=ENCODER_BACKENDS, default=list(ENCODER_BACKENDS))
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    corpus = make_news_corpus(args.articles)
+    # Same text NewsRAGEngine embeds for an article
+    texts = [f"{article['title']} {article['summary']}".strip() for article in corpus]
+    queries = make_queries(args.queries)
+
+    # torch is the reference for overlap and cosine, so it always runs first
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+    baseline = None
+    results = []
+    for backend in backends:
+        try:
+            result, article_vectors, query_vectors = evaluate(backend, texts, queries, args.batch_size, args.k)
+        except Exception as e:
+            print(f"{backend:>6}: skipped ({e})")
+            if backend == "torch":
+                # Comparing the other backends against one another would pass one off as the reference
+                print("        torch fp32 reference unavailable; speedup, overlap and cosine are not reported")
+            continue
+        if backend == "torch":
+            baseline = {"articles": article_vectors, "top_k": top_k(article_vectors, query_vectors, args.k),
+                        "articles_per_sec": result["articles_per_sec"]}
+        speedup = overlap = cosine = None
+        if baseline is not None:
+            hits = top_k(article_vectors, query_vectors, args.k)
+            speedup = round(result["articles_per_sec"] / baseline["articles_per_sec"], 2)
+            overlap = round(float(np.mean([len(set(a) & set(b)) / args.k for a, b in zip(hits, baseline["top_k"])])), 4)
+            cosine = round(float(np.mean(np.sum(normalize(article_vectors) * normalize(baseline["articles"]), axis=1))), 5)
+        result.update({
+            "backend": backend,
+            "speedup": speedup,
+            f"top{args.k}_overlap": overlap,
+            "mean_cosine_to_torch": cosine,
+        })
+        results.append(result)
+        print(f"{backend:>6}: {json.dumps(result)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"model": EMBED_MODEL_NAME, "articles": args.articles, "queries": args.queries,
+                       "k": args.k, "reference": "torch" if baseline is not None else None,
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Synthetic portfolios and news corpora for the benchmarks.
+
+Everything is seeded, so the same arguments always produce the same data.
+
+Run from backend/:
+    python benchmarks/generators.py portfolio --rows 100000 --format csv --out /tmp/portfolio.csv
+    python benchmarks/generators.py news --articles 10000 --out /tmp/news.json
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+ASSET_TYPES = ["Stock", "Mutual Fund", "Crypto", "Bond", "ETF"]
+COMPANIES = [
+    ("Infosys", "INFY"), ("Tata Consultancy Services", "TCS"), ("Wipro", "WIPRO"),
+    ("Reliance Industries", "RELIANCE"), ("HDFC Bank", "HDFCBANK"), ("ICICI Bank", "ICICIBANK"),
+    ("State Bank of India", "SBIN"), ("Adani Green Energy", "ADANIGREEN"), ("Tata Motors", "TATAMOTORS"),
+    ("Bharti Airtel", "BHARTIARTL"), ("Asian Paints", "ASIANPAINT"), ("Maruti Suzuki", "MARUTI"),
+    ("Sun Pharmaceutical", "SUNPHARMA"), ("Larsen & Toubro", "LT"), ("ITC", "ITC"), ("Bitcoin", "BTC"),
+]
+EVENTS = [
+    ("posts quarterly earnings", "Revenue grew {pct}% year on year as margins {move}."),
+    ("announces dividend", "The board approved a dividend of Rs {amount} per share."),
+    ("shares {move} after analyst call", "Brokerages revised targets after management commentary."),
+    ("wins large contract", "The order is worth Rs {amount} crore and runs for five years."),
+    ("faces regulatory scrutiny", "The regulator sought details on related-party transactions."),
+]
+MOVES = ["rise", "fall", "widened", "narrowed"]
+PORTFOLIO_COLUMNS = ["Asset", "Type", "Invested_Amount", "Current_Value", "Date"]
+
+
+def make_portfolio(rows, assets=500, seed=0):
+    """
+    Portfolio lots in the upload format.
+
+    Args:
+        rows (int): Number of lots
+        assets (int): Distinct Asset names the lots are spread over
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Asset, Type, Invested_Amount, Current_Value and Date columns
+    """
+    rng = np.random.default_rng(seed)
+    invested = rng.integers(1000, 100000, size=rows).astype(float)
+    names = [name for name, _ in COMPANIES] + [f"ASSET{i}" for i in range(max(0, assets - len(COMPANIES)))]
+    start = np.datetime64("2015-01-01")
+    return pd.DataFrame({
+        "Asset": np.array(names[:assets], dtype=object)[np.arange(rows) % assets],
+        "Type": rng.choice(ASSET_TYPES, size=rows),
+        "Invested_Amount": invested,
+        "Current_Value": np.round(invested * rng.uniform(0.5, 1.8, size=rows), 2),
+        "Date": (start + rng.integers(0, 3650, size=rows).astype("timedelta64[D]")).astype(str),
+    })
+
+
+def write_portfolio_csv(frame, path):
+    frame.to_csv(path, index=False)
+
+
+def write_portfolio_xlsx(frame, path):
+    frame.to_excel(path, index=False, engine="openpyxl")
+
+
+def _pdf_escape(text):
+    return str(text).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def portfolio_pdf_bytes(frame, rows_per_page=40, col_width=100, row_height=18):
+    """
+    A minimal PDF with the portfolio as a ruled table, one header row per page.
+
+    Written directly rather than through a PDF library so the benchmarks
+    need nothing beyond the runtime requirements. Cell borders are drawn
+    as lines, which is what pdfplumber's table finder looks for.
+    """
+    header = list(frame.columns)
+    values = frame.astype(str).values.tolist()
+    pages = [[header] + values[start:start + rows_per_page] for start in range(0, len(values), rows_per_page)]
+
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(b"")
+    page_ids = []
+    for rows in pages:
+        columns = len(header)
+        top = 800
+        width = columns * col_width
+        ops = [f"40 {top - i * row_height} m {40 + width} {top - i * row_height} l S" for i in range(len(rows) + 1)]
+        ops += [f"{40 + j * col_width} {top} m {40 + j * col_width} {top - len(rows) * row_height} l S"
+                for j in range(columns + 1)]
+        for i, row in enumerate(rows):
+            y = top - (i + 1) * row_height + 5
+            for j, cell in enumerate(row):
+                ops.append(f"BT /F1 9 Tf {40 + j * col_width + 3} {y} Td ({_pdf_escape(cell)}) Tj ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, content, font)
+        ))
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page for page in page_ids), len(page_ids))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+def write_portfolio_pdf(frame, path):
+    with open(path, "wb") as f:
+        f.write(portfolio_pdf_bytes(frame))
+
+
+PORTFOLIO_WRITERS = {"csv": write_portfolio_csv, "xlsx": write_portfolio_xlsx, "pdf": write_portfolio_pdf}
+
+
+def make_news_corpus(articles, seed=0, days=60):
+    """
+    Feed-shaped news articles about COMPANIES plus generic market stories.
+
+    Args:
+        articles (int): Number of articles
+        seed (int): Random seed
+        days (int): Articles are dated over this many days up to now
+
+    Returns:
+        list: Article dictionaries with title, summary, link, guid and published
+    """
+    rng = np.random.default_rng(seed)
+    # Drawn separately so titles, subjects and dates stay what they were before stories had figures
+    figures = np.random.default_rng([seed, 1])
+    now = datetime.now(timezone.utc)
+    corpus = []
+    for i in range(articles):
+        template_title, template_summary = EVENTS[rng.integers(len(EVENTS))]
+        fields = {"pct": int(rng.integers(1, 40)), "amount": int(rng.integers(5, 5000)),
+                  "move": MOVES[rng.integers(len(MOVES))]}
+        if rng.random() < 0.8:
+            name, ticker = COMPANIES[rng.integers(len(COMPANIES))]
+            subject = name if rng.random() < 0.7 else ticker
+        else:
+            subject = f"Midcap firm {int(rng.integers(10000))}"
+        link = f"https://news.example.com/markets/{i}"
+        corpus.append({
+            "title": f"{subject} {template_title.format(**fields)}",
+            "summary": f"{template_summary.format(**fields)} Story {i}. Shares closed at Rs "
+                       f"{figures.uniform(50, 5000):.2f}, {figures.uniform(-8, 8):+.2f}% on the day, with "
+                       f"{int(figures.integers(1, 900))} lakh shares traded against a 20-day average of "
+                       f"{int(figures.integers(1, 900))} lakh.",
+            "link": link,
+            "guid": link,
+            "published": (now - timedelta(minutes=int(rng.integers(0, days * 24 * 60)))).isoformat(),
+        })
+    return corpus
+
+
+def make_news_variants(corpus, rate=0.3, seed=0):
+    """
+    A corpus with syndicated near-duplicates of its stories mixed in.
+
+    Each variant re-publishes an earlier article under a new link with one
+    small edit: an "UPDATE" headline, an HTML-wrapped summary, a revised
+    closing figure, or its lead paragraph repeated.
+
+    Args:
+        corpus (list): Articles from make_news_corpus
+        rate (float): Variants per original article, on average
+        seed (int): Random seed
+
+    Returns:
+        list: Originals and variants; every article has "story", the guid it copies (its own for originals)
+    """
+    rng = np.random.default_rng(seed)
+    mixed = []
+    for article in corpus:
+        mixed.append({**article, "story": article["guid"]})
+        for copy in range(rng.poisson(rate)):
+            edit = int(rng.integers(4))
+            variant = dict(article)
+            if edit == 0:
+                variant["title"] = f"UPDATE {copy + 1}-{article['title']}"
+            elif edit == 1:
+                variant["summary"] = f"<p>{article['summary']}</p>"
+            elif edit == 2:
+                variant["summary"] = article["summary"].replace("Shares closed", "Shares ended", 1)
+            else:
+                lead = article["summary"].split(". ")[0] + "."
+                variant["summary"] = f"{lead}\n{article['summary']}"
+            link = f"{article['link']}/syndicated/{copy}"
+            mixed.append({**variant, "link": link, "guid": link, "story": article["guid"]})
+    return mixed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    portfolio = commands.add_parser("portfolio")
+    portfolio.add_argument("--rows", type=int, default=1000)
+    portfolio.add_argument("--format", choices=sorted(PORTFOLIO_WRITERS), default="csv")
+    portfolio.add_argument("--seed", type=int, default=0)
+    portfolio.add_argument("--out", required=True)
+    news = commands.add_parser("news")
+    news.add_argument("--articles", type=int, default=1000)
+    news.add_argument("--seed", type=int, default=0)
+    news.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    if args.command == "portfolio":
+        PORTFOLIO_WRITERS[args.format](make_portfolio(args.rows, seed=args.seed), args.out)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(make_news_corpus(args.articles, seed=args.seed), f, ensure_ascii=False)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
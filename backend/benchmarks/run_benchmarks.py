@@ -0,0 +1,314 @@
+"""
+Benchmark suite for the hot paths, writing JSON results that can be compared
+between commits.
+
+Suites:
+    parse    parse_portfolio_frame on generated CSV/XLSX/PDF uploads
+    analyze  analyze_portfolio_frame with and without Detailed_Assets rows
+    news     NewsRAGEngine cold/warm build, reopen and search latency
+    api      /chat/ask and /search-news/ end to end against the stub LLM
+
+Run from backend/:
+    python benchmarks/run_benchmarks.py --suites parse analyze --rows 1000 100000 --out before.json
+    python benchmarks/run_benchmarks.py --suites news api --news-articles 5000 --out after.json
+    python benchmarks/run_benchmarks.py --compare before.json after.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import numpy as np
+from generators import PORTFOLIO_WRITERS, make_news_corpus, make_portfolio
+
+SUITES = ("parse", "analyze", "news", "api")
+# Metrics where a larger number is better; everything else is a duration
+HIGHER_IS_BETTER_SUFFIX = "_per_sec"
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def percentiles_ms(latencies):
+    latencies = np.array(latencies) * 1000.0
+    return round(float(np.percentile(latencies, 50)), 3), round(float(np.percentile(latencies, 99)), 3)
+
+
+def bench_parse(args):
+    from utils.file_parser import parse_portfolio_frame
+
+    results = []
+    limits = {"csv": None, "xlsx": args.xlsx_max_rows, "pdf": args.pdf_max_rows}
+    for rows in args.rows:
+        frame = make_portfolio(rows)
+        for fmt in args.formats:
+            if limits[fmt] is not None and rows > limits[fmt]:
+                print(f"  skip {fmt} rows={rows} (above --{fmt}-max-rows)")
+                continue
+            with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as tmp:
+                path = tmp.name
+            try:
+                PORTFOLIO_WRITERS[fmt](frame, path)
+                with open(path, "rb") as f:
+                    content = f.read()
+            finally:
+                os.remove(path)
+            filename = f"portfolio.{fmt}"
+            seconds = best_of(lambda: parse_portfolio_frame(filename, io.BytesIO(content), max_rows=rows + 1),
+                              args.repeat)
+            results.append({"suite": "parse", "case": f"{fmt} rows={rows}", "metrics": {
+                "seconds": round(seconds, 4),
+                "rows_per_sec": round(rows / seconds, 1),
+                "file_bytes": len(content),
+            }})
+    return results
+
+
+def bench_analyze(args):
+    from utils.analyzer import analyze_portfolio_frame
+
+    results = []
+    for rows in args.rows:
+        frame = make_portfolio(rows)
+        details = best_of(lambda: analyze_portfolio_frame(frame), args.repeat)
+        aggregates = best_of(lambda: analyze_portfolio_frame(frame, include_details=False), args.repeat)
+        results.append({"suite": "analyze", "case": f"rows={rows}", "metrics": {
+            "details_ms": round(details * 1000.0, 3),
+            "aggregates_ms": round(aggregates * 1000.0, 3),
+        }})
+    return results
+
+
+def bench_news(args):
+    from utils.news_rag import NewsRAGEngine
+    from utils.news_store import NewsStore
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = NewsStore(os.path.join(workdir, "news_store.db"))
+        store.append(make_news_corpus(args.news_articles))
+
+        start = time.perf_counter()
+        engine = NewsRAGEngine(store)
+        cold_build = time.perf_counter() - start
+        warm_build = best_of(engine.build_faiss_index, 1)
+        start = time.perf_counter()
+        engine = NewsRAGEngine(store)
+        reopen = time.perf_counter() - start
+
+        queries = [f"{name} quarterly earnings outlook {i}" for i, name in
+                   enumerate(["Infosys", "HDFC Bank", "Tata Motors", "dividend", "regulator"] * 40)]
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            engine.search_relevant_news(query, top_k=5)
+            latencies.append(time.perf_counter() - start)
+        search_p50, search_p99 = percentiles_ms(latencies)
+
+        batch = queries[:32]
+        batch_time = best_of(lambda: engine.search_batch(batch, top_k=5), args.repeat)
+
+        company_latencies = []
+        for name in ["INFY", "Infosys", "Adani Green", "Midcap firm 42", "TCS"] * 20:
+            start = time.perf_counter()
+            engine.search_by_company(name, top_k=5)
+            company_latencies.append(time.perf_counter() - start)
+        company_p50, company_p99 = percentiles_ms(company_latencies)
+
+    return [{"suite": "news", "case": f"articles={args.news_articles}", "metrics": {
+        "cold_build_sec": round(cold_build, 3),
+        "warm_build_sec": round(warm_build, 3),
+        "reopen_sec": round(reopen, 3),
+        "search_p50_ms": search_p50,
+        "search_p99_ms": search_p99,
+        "batch32_per_query_ms": round(batch_time * 1000.0 / len(batch), 3),
+        "company_p50_ms": company_p50,
+        "company_p99_ms": company_p99,
+    }}]
+
+
+def _load_requests(client, method, path, concurrency, count, make_kwargs):
+    def one(i):
+        start = time.perf_counter()
+        response = getattr(client, method)(path, **make_kwargs(i))
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(one, range(count)))
+    elapsed = time.perf_counter() - start
+    p50, p99 = percentiles_ms(latencies)
+    return p50, p99, round(count / elapsed, 2)
+
+
+def bench_api(args):
+    """
+    Run the api suite in a fresh interpreter.
+
+    main and the modules it imports read their paths and feed list from the
+    environment at import time, and earlier suites in this process have
+    already imported them, so the overrides only take effect in a child.
+    """
+    with tempfile.TemporaryDirectory(prefix="bench_api_") as workdir:
+        out_path = os.path.join(workdir, "api.json")
+        env = {
+            **os.environ,
+            "NEWS_STORE_PATH": os.path.join(workdir, "news_store.db"),
+            "NEWS_FEEDS": "",
+            "SESSION_STORE": "memory",
+        }
+        command = [
+            sys.executable, os.path.abspath(__file__), "--api-child", "--suites", "api", "--out", out_path,
+            "--news-articles", str(args.news_articles), "--requests", str(args.requests),
+            "--llm-token-delay-ms", str(args.llm_token_delay_ms), "--repeat", str(args.repeat),
+            "--concurrency", *map(str, args.concurrency),
+        ]
+        subprocess.run(command, env=env, check=True)
+        with open(out_path, "r", encoding="utf-8") as f:
+            return json.load(f)["results"]
+
+
+def _bench_api_child(args):
+    from stub_llm import start_stub_llm
+
+    server, url = start_stub_llm(token_delay_ms=args.llm_token_delay_ms)
+    # main reads this at import time; the paths and feed list were set by bench_api
+    os.environ["OLLAMA_URL"] = url
+    import main
+    from fastapi.testclient import TestClient
+
+    main.news_store.append(make_news_corpus(args.news_articles))
+    portfolio = io.BytesIO()
+    make_portfolio(200, assets=50).to_csv(portfolio, index=False)
+
+    results = []
+    with TestClient(main.app) as client:
+        session_id = client.post("/chat/session").json()["session_id"]
+        client.post("/chat/upload", data={"session_id": session_id},
+                    files={"file": ("portfolio.csv", portfolio.getvalue(), "text/csv")}).raise_for_status()
+        # First query loads the engine; keep it out of the measurements
+        client.get("/search-news/", params={"query": "warm up"}).raise_for_status()
+
+        for concurrency in args.concurrency:
+            ask = _load_requests(
+                client, "post", "/chat/ask", concurrency, args.requests,
+                lambda i: {"data": {"session_id": session_id, "no_cache": "true",
+                                    "question": f"How exposed am I to sector {i}?"}},
+            )
+            cached = _load_requests(
+                client, "post", "/chat/ask", concurrency, args.requests,
+                lambda i: {"data": {"session_id": session_id, "question": "How exposed am I to sector 0?"}},
+            )
+            search = _load_requests(
+                client, "get", "/search-news/", concurrency, args.requests,
+                lambda i: {"params": {"query": f"Infosys earnings {i}", "top_k": 5}},
+            )
+            results.append({"suite": "api", "case": f"articles={args.news_articles} concurrency={concurrency}",
+                            "metrics": {
+                                "ask_p50_ms": ask[0], "ask_p99_ms": ask[1], "ask_per_sec": ask[2],
+                                "ask_cached_p50_ms": cached[0], "ask_cached_p99_ms": cached[1],
+                                "ask_cached_per_sec": cached[2],
+                                "search_p50_ms": search[0], "search_p99_ms": search[1], "search_per_sec": search[2],
+                            }})
+    server.shutdown()
+    return results
+
+
+BENCHMARKS = {"parse": bench_parse, "analyze": bench_analyze, "news": bench_news, "api": bench_api}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(old_path, new_path, tolerance):
+    """Print metric changes between two result files; returns the number of regressions."""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    old_results = {(r["suite"], r["case"]): r["metrics"] for r in old["results"]}
+    print(f"{old_path} ({old.get('commit')}) -> {new_path} ({new.get('commit')})")
+    regressions = 0
+    for result in new["results"]:
+        before = old_results.get((result["suite"], result["case"]))
+        if before is None:
+            continue
+        for metric, value in result["metrics"].items():
+            previous = before.get(metric)
+            if not previous or not isinstance(value, (int, float)) or metric == "file_bytes":
+                continue
+            change = value / previous - 1.0
+            worse = -change if metric.endswith(HIGHER_IS_BETTER_SUFFIX) else change
+            flag = "REGRESSION" if worse > tolerance else ("improved" if worse < -tolerance else "")
+            regressions += flag == "REGRESSION"
+            print(f"{result['suite']:>8} {result['case']:<30} {metric:<22} {previous:>12} -> {value:>12} "
+                  f"{change * 100:+7.1f}% {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--formats", nargs="+", choices=sorted(PORTFOLIO_WRITERS), default=["csv", "xlsx", "pdf"])
+    parser.add_argument("--xlsx-max-rows", type=int, default=100000)
+    parser.add_argument("--pdf-max-rows", type=int, default=10000)
+    parser.add_argument("--news-articles", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per API measurement")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--llm-token-delay-ms", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="Write results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files and exit")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Relative change reported as a regression")
+    parser.add_argument("--api-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.api_child:
+        BENCHMARKS["api"] = _bench_api_child
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.tolerance) else 0)
+
+    results = []
+    for suite in args.suites:
+        print(f"[{suite}]")
+        for result in BENCHMARKS[suite](args):
+            print(f"  {result['case']}: {json.dumps(result['metrics'])}")
+            results.append(result)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
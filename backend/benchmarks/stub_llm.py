@@ -0,0 +1,79 @@
+"""
+Ollama-compatible stand-in for /api/generate, so the chat endpoints can be
+benchmarked without a model. Answers a fixed sentence, streamed or not,
+with an optional per-token delay.
+
+Run from backend/:
+    python benchmarks/stub_llm.py --port 11500 --token-delay-ms 20
+    OLLAMA_URL=http://127.0.0.1:11500/api/generate uvicorn main:app
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER_TOKENS = ["Your", " portfolio", " is", " diversified", " across", " stocks", " and", " funds", "."]
+
+
+def make_handler(token_delay):
+    class StubLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not request.get("stream"):
+                time.sleep(token_delay * len(ANSWER_TOKENS))
+                body = json.dumps({"response": "".join(ANSWER_TOKENS), "done": True}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for position, token in enumerate(ANSWER_TOKENS + [""]):
+                time.sleep(token_delay)
+                line = (json.dumps({"response": token, "done": position == len(ANSWER_TOKENS)}) + "\n").encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+    return StubLLMHandler
+
+
+def start_stub_llm(port=0, token_delay_ms=0.0):
+    """
+    Serve the stub on a background thread.
+
+    Returns:
+        tuple: (server, generate URL); call server.shutdown() when done
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(token_delay_ms / 1000.0))
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api/generate"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--token-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    server, url = start_stub_llm(args.port, args.token_delay_ms)
+    print(f"Stub LLM listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
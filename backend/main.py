@@ -3,81 +3,250 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
-from fastapi import FastAPI, UploadFile, File, Form
-from utils.file_parser import parse_portfolio
-from utils.analyzer import analyze_portfolio
+from typing import List
+from fastapi import FastAPI, UploadFile, File, Form, Request
 from fastapi import HTTPException
-from utils.news_rag import NewsRAGEngine
-import requests
-import feedparser
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from utils.query_batcher import QueryBatcher
+from utils.session_store import SessionTooLargeError, create_session_store
+from utils.prompt_builder import build_chat_prompt, top_holdings
+from utils.answer_cache import SemanticAnswerCache, portfolio_hash
+from utils.news_feeds import FeedIngestor
+from utils.news_store import NewsStore
+from utils.metrics import REGISTRY, STAGE_SECONDS, Counter, Gauge, Histogram, span
+from utils import batch_analysis
+from utils.concurrency import AdmissionLimiter, Overloaded, StageExecutor
+import asyncio
+import shutil
+import tempfile
+import time
+import httpx
 import json
 import uuid
-from typing import Dict, List, Any
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 
 app = FastAPI()
 
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+HTTP_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response starts, by route; streamed bodies continue after this.",
+    ("method", "route"),
+)
+LLM_REQUESTS = Counter("llm_requests_total", "Ollama generate calls by mode and outcome.", ("mode", "outcome"))
+CHAT_ANSWERS = Counter("chat_answers_total", "Chat answers by where they came from.", ("source",))
+BATCH_PORTFOLIOS = Counter("batch_portfolios_total", "Portfolios analyzed by /batch/analyze, by outcome.", ("outcome",))
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, so session ids don't explode the series count
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        HTTP_SECONDS.observe(time.perf_counter() - start, method=request.method, route=route_path)
+        HTTP_REQUESTS.inc(method=request.method, route=route_path, status=status)
+
+
+# Blocking work runs on sized executors, one per kind of work, instead of the event loop
+# or one shared pool: parsing/analysis (cpu), news searches and refreshes (news), session I/O (io)
+CPU_EXECUTOR = StageExecutor("cpu", int(os.getenv("CPU_EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1)))))
+NEWS_EXECUTOR = StageExecutor("news", int(os.getenv("NEWS_EXECUTOR_WORKERS", "4")))
+IO_EXECUTOR = StageExecutor("io", int(os.getenv("IO_EXECUTOR_WORKERS", "16")))
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail},
+                        headers={"Retry-After": str(exc.retry_after)})
+
 # Ollama settings; default disabled for hosted environments
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
 #USE_OLLAMA = os.getenv("USE_OLLAMA", "false").lower() == "true"
-# OLLAMA_TIMEOUT_SEC = float(os.getenv("OLLAMA_TIMEOUT_SEC", "5"))
-
-def fetch_rss_news(rss_url):
-    try:
-        feed = feedparser.parse(rss_url)
-        news = []
-        for entry in feed.entries[:len(feed.entries)]:
-            news.append({
-                "title": entry.title,
-                "link": entry.link,
-                "summary": entry.summary if "summary" in entry else ""
-            })
-        return news
-    except Exception as e:
-        print(f"Error fetching news articles: {e}")
-        return []
+OLLAMA_CONNECT_TIMEOUT_SEC = float(os.getenv("OLLAMA_CONNECT_TIMEOUT_SEC", "5"))
+# Read timeout bounds the gap between streamed chunks, not the whole generation
+OLLAMA_READ_TIMEOUT_SEC = float(os.getenv("OLLAMA_READ_TIMEOUT_SEC", "120"))
+# A non-streaming reply arrives only once generation is done, so it gets its own limit; 0 = no limit
+OLLAMA_GENERATE_TIMEOUT_SEC = float(os.getenv("OLLAMA_GENERATE_TIMEOUT_SEC", "0"))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20"))
+
+# Admission control per route group: requests beyond the concurrency limit wait in a
+# bounded queue; a full queue answers 429 at once, a wait past the timeout answers 503
+ADMISSION_QUEUE_TIMEOUT_SEC = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SEC", "10"))
+upload_limiter = AdmissionLimiter(
+    "upload", int(os.getenv("UPLOAD_MAX_CONCURRENT", str(CPU_EXECUTOR.max_workers))),
+    int(os.getenv("UPLOAD_MAX_QUEUE", "16")), ADMISSION_QUEUE_TIMEOUT_SEC,
+)
+chat_limiter = AdmissionLimiter(
+    "chat", int(os.getenv("CHAT_MAX_CONCURRENT", str(OLLAMA_MAX_CONNECTIONS))),
+    int(os.getenv("CHAT_MAX_QUEUE", "64")), ADMISSION_QUEUE_TIMEOUT_SEC,
+)
+search_limiter = AdmissionLimiter(
+    "search_news", int(os.getenv("SEARCH_MAX_CONCURRENT", "64")),
+    int(os.getenv("SEARCH_MAX_QUEUE", "256")), ADMISSION_QUEUE_TIMEOUT_SEC,
+)
+batch_limiter = AdmissionLimiter(
+    "batch", int(os.getenv("BATCH_MAX_CONCURRENT", "1")),
+    int(os.getenv("BATCH_MAX_QUEUE", "0")), ADMISSION_QUEUE_TIMEOUT_SEC,
+)
 
 # Set BASE_DIR at the top for consistent path handling
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Path to news cache file
-rss_url = "https://economictimes.indiatimes.com/markets/rssfeeds/1977021501.cms"
+# Articles accumulate in an append-only store; the old JSON cache is imported once
 news_json_path = os.path.join(BASE_DIR, "data", "news_articles.json")
-os.makedirs(os.path.dirname(news_json_path), exist_ok=True)
+news_store = NewsStore()
+if len(news_store) == 0:
+    news_store.import_json(news_json_path)
 
-# Ensure the file exists with an empty list initially to avoid blocking startup
-if not os.path.exists(news_json_path):
-    with open(news_json_path, "w", encoding="utf-8") as f:
-        json.dump([], f)
+# Feeds (NEWS_FEEDS) are fetched concurrently on a schedule after the app starts,
+# so startup is non-blocking; validators and per-feed articles live next to the news store
+from threading import Lock
 
-# Fetch RSS in background after app starts, so startup is non-blocking
-from threading import Thread
+feed_ingestor = FeedIngestor(state_path=os.path.join(BASE_DIR, "data", "news_feeds_state.json"))
+news_refresh_task = None
+
+
+def _store_news(news_articles):
+    # One transaction per refresh, so readers never see part of it
+    added = news_store.append(news_articles)
+    expired = news_store.expire()
+    print(f"[news_feeds] Stored {added} new news articles, expired {expired} ({len(news_store)} total)")
+
+    # Hot-swap the refreshed articles into an engine that is already serving
+    with _news_engine_lock:
+        engine = news_engine
+    if engine is not None:
+        engine.refresh_from_store()
+
+
+async def publish_news(news_articles):
+    await NEWS_EXECUTOR.run(_store_news, news_articles)
 
-def _refresh_news_background():
-    try:
-        print("[startup] Fetching news articles in background...")
-        news_articles = fetch_rss_news(rss_url)
-        with open(news_json_path, "w", encoding="utf-8") as f:
-            json.dump(news_articles, f, ensure_ascii=False, indent=2)
-        print(f"[startup] Wrote {len(news_articles)} news articles to {news_json_path}")
-    except Exception as exc:
-        print(f"[startup] Failed to refresh news: {exc}")
 
 @app.on_event("startup")
-def schedule_news_refresh():
-    Thread(target=_refresh_news_background, daemon=True).start()
+async def schedule_news_refresh():
+    global news_refresh_task
+    news_refresh_task = asyncio.create_task(feed_ingestor.run_forever(publish_news))
+
+
+@app.on_event("shutdown")
+async def stop_news_refresh():
+    global news_refresh_task
+    if news_refresh_task is not None:
+        news_refresh_task.cancel()
+        try:
+            await news_refresh_task
+        except asyncio.CancelledError:
+            pass
+        news_refresh_task = None
+    await feed_ingestor.aclose()
+    batch_analysis.shutdown_pool()
+    for executor in (CPU_EXECUTOR, NEWS_EXECUTOR, IO_EXECUTOR):
+        executor.shutdown()
+
 # Lazily initialize heavy NewsRAGEngine to avoid blocking app startup
 news_engine = None
+_news_engine_lock = Lock()
 
 def get_news_engine():
     global news_engine
     if news_engine is None:
-        news_engine = NewsRAGEngine(news_json_path)
+        with _news_engine_lock:
+            if news_engine is None:
+                # sentence_transformers/torch/faiss are imported here, not when the app loads
+                from utils.news_rag import NewsRAGEngine
+                news_engine = NewsRAGEngine(news_store)
     return news_engine
 
-# Simple in-memory session store
-sessions: Dict[str, Dict[str, Any]] = {}
+# Optionally load the model, news index and parsing modules in the background right
+# after startup, so the first requests don't pay for them; /api/ready reports when done
+NEWS_WARMUP = os.getenv("NEWS_WARMUP", "false").lower() == "true"
+news_warmup_task = None
+
+
+def _warm_up():
+    try:
+        with span("warmup"):
+            start = time.perf_counter()
+            upload_modules()
+            # The first encode call also initializes the model's kernels
+            get_news_engine().search_relevant_news("market update", top_k=1)
+        print(f"[startup] Warm-up finished in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"[startup] Warm-up failed: {e}")
+
+
+@app.on_event("startup")
+async def schedule_warm_up():
+    global news_warmup_task
+    if NEWS_WARMUP:
+        news_warmup_task = asyncio.create_task(run_in_threadpool(_warm_up))
+
+# Concurrent searches are coalesced into batched encode + FAISS calls
+query_batcher = QueryBatcher(
+    get_news_engine,
+    max_batch_size=int(os.getenv("NEWS_QUERY_MAX_BATCH", "32")),
+    max_wait_ms=float(os.getenv("NEWS_QUERY_BATCH_WINDOW_MS", "2")),
+)
+
+
+async def batched_news_search(query: str, top_k: int = 5, threshold: float = 2.0):
+    """Run a news search through the query batcher without blocking the event loop."""
+    results, generation, _ = await asyncio.wrap_future(
+        query_batcher.submit(query, top_k=top_k, threshold=threshold)
+    )
+    return results, generation
+
+
+async def company_news_search(company_names, top_k: int = 5):
+    """Entity-index + semantic news lookup for several companies, off the event loop."""
+    return await NEWS_EXECUTOR.run(
+        lambda: get_news_engine().search_by_companies(company_names, top_k=top_k)
+    )
+
+# News for the largest holdings is searched once at upload and kept in the session;
+# a chat turn re-runs the search only when the news index generation has moved on
+HOLDING_NEWS_ASSETS = int(os.getenv("CHAT_HOLDING_NEWS_ASSETS", "20"))
+HOLDING_NEWS_TOP_K = int(os.getenv("CHAT_HOLDING_NEWS_TOP_K", "3"))
+# Fields kept per cached article; the full text stays in the news store
+HOLDING_NEWS_FIELDS = ("title", "summary", "link", "published", "source")
+
+
+async def holding_news_for(assets):
+    """
+    One batched news search for all holdings, trimmed for storing in the session.
+
+    Returns:
+        dict: {"generation", "assets", "news_by_asset"}; generation is None if
+            the search failed, so the next chat turn retries it
+    """
+    try:
+        with span("holding_news"):
+            results, generation = await company_news_search(assets, top_k=HOLDING_NEWS_TOP_K)
+    except Exception as e:
+        print(f"Error occured in method holding_news_for: {e}")
+        return {"generation": None, "assets": assets, "news_by_asset": {}}
+    news_by_asset = {
+        asset: [{field: article[field] for field in HOLDING_NEWS_FIELDS if article.get(field) is not None}
+                for article in results.get(asset, [])]
+        for asset in assets
+    }
+    return {"generation": generation, "assets": assets, "news_by_asset": news_by_asset}
+
+
+# Near-duplicate questions on the same portfolio and news generation reuse answers
+answer_cache = SemanticAnswerCache()
+
+# Session store: in-memory LRU/TTL by default, SQLite when shared across workers
+session_store = create_session_store()
 
 # Mount static directory at /ui instead of root
 # PUBLIC_DIR = os.path.join(BASE_DIR, "public")
@@ -86,37 +255,102 @@ sessions: Dict[str, Dict[str, Any]] = {}
 # app.mount("/ui", StaticFiles(directory=PUBLIC_DIR, html=True), name="static")
 
 
-def news_impact_query(query: str):
+async def news_impact_query(query: str):
     try:
-        engine = get_news_engine()
-        relevant_news = engine.search_relevant_news(query)
-        return {"relevant_news": relevant_news}
+        relevant_news, generation, query_vector = await asyncio.wrap_future(query_batcher.submit(query))
+        return {"relevant_news": relevant_news, "index_generation": generation, "query_vector": query_vector}
     except Exception as e:
         print(f"Error occured in method news_impact_query: {e}")
 
 
-def ask_ollama(prompt):
+# Pooled async HTTP client for Ollama, created on first use
+ollama_client = None
+
+def get_ollama_client():
+    global ollama_client
+    if ollama_client is None:
+        ollama_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                OLLAMA_READ_TIMEOUT_SEC,
+                connect=OLLAMA_CONNECT_TIMEOUT_SEC,
+                read=OLLAMA_READ_TIMEOUT_SEC,
+            ),
+            limits=httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_MAX_CONNECTIONS,
+            ),
+        )
+    return ollama_client
+
+
+@app.on_event("shutdown")
+async def close_ollama_client():
+    global ollama_client
+    if ollama_client is not None:
+        await ollama_client.aclose()
+        ollama_client = None
+
+
+def _ollama_payload(prompt, stream):
+    return {
+        "model": os.getenv("OLLAMA_MODEL", "phi3:mini"),
+        "prompt": prompt,
+        "stream": stream
+    }
+
+
+async def ask_ollama(prompt):
     # Allow disabling Ollama for hosted environments (e.g., Render)
     # if not USE_OLLAMA:
     #     return "(LLM disabled)"
     try:
-        resp = requests.post(
-            OLLAMA_URL,
-            json={
-                "model": os.getenv("OLLAMA_MODEL", "phi3:mini"),
-                "prompt": prompt,
-                "stream": False
-            },
-        )
-        if resp.ok:
+        with span("llm"):
+            resp = await get_ollama_client().post(
+                OLLAMA_URL,
+                json=_ollama_payload(prompt, False),
+                timeout=httpx.Timeout(OLLAMA_GENERATE_TIMEOUT_SEC or None, connect=OLLAMA_CONNECT_TIMEOUT_SEC),
+            )
+        if resp.is_success:
+            LLM_REQUESTS.inc(mode="blocking", outcome="ok")
             return resp.json().get("response", "")
+        LLM_REQUESTS.inc(mode="blocking", outcome="http_error")
         print(f"ask_ollama HTTP {resp.status_code}: {resp.text[:200]}")
         return ""
     except Exception as e:
+        LLM_REQUESTS.inc(mode="blocking", outcome="error")
         print(f"Error occured in method ask_ollama {e}")
         return ""
 
 
+async def stream_ollama(prompt):
+    """
+    Yield response fragments from Ollama as they are generated.
+
+    Ollama streams one JSON object per line; each carries a "response"
+    fragment and the last one has "done": true.
+    """
+    async with get_ollama_client().stream("POST", OLLAMA_URL, json=_ollama_payload(prompt, True)) as resp:
+        if not resp.is_success:
+            body = await resp.aread()
+            raise RuntimeError(f"Ollama HTTP {resp.status_code}: {body[:200]!r}")
+        async for line in resp.aiter_lines():
+            if not line.strip():
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise RuntimeError(f"Ollama error: {chunk['error']}")
+            if chunk.get("response"):
+                yield chunk["response"]
+            if chunk.get("done"):
+                break
+
+
+LLM_UNAVAILABLE_ANSWER = (
+    "I'm unable to generate an LLM response right now. "
+    "Please ensure the LLM service is available or try again later."
+)
+
+
 @app.get("/")
 def read_root():
     """Redirect root to the UI"""
@@ -128,98 +362,340 @@ def health_check():
     return {"message": "Investor Portfolio Assistant API is running!"}
 
 
+@app.get("/api/ready")
+def readiness_check():
+    """
+    Readiness, as opposed to liveness: 200 once the embedding model and news
+    index are loaded, 503 before that.
+    """
+    engine = news_engine
+    body = {
+        "ready": engine is not None,
+        "warming": news_warmup_task is not None and not news_warmup_task.done(),
+        "index_generation": engine.generation if engine is not None else None,
+    }
+    return JSONResponse(body, status_code=200 if engine is not None else 503)
+
+
 # Session management
 @app.post("/chat/session")
 def create_session():
     try:
         session_id = str(uuid.uuid4())
-        sessions[session_id] = {
-            "history": [],           # list of {role, content}
-            "portfolio": None        # parsed portfolio data
-        }
+        session_store.create(session_id)
         return {"session_id": session_id}
     except Exception as e:
         print(f"Error occured in creating session: {e}")
 
 
+def upload_modules():
+    """The pandas-backed parsing modules, imported on first upload (or warm-up) instead of at app load."""
+    from utils import analyzer, file_parser
+    return file_parser, analyzer
+
+
 # Fix ValueError exception parenthesis
 @app.post("/chat/upload")
+@upload_limiter.admit
 async def upload_portfolio(session_id: str = Form(...), file: UploadFile = File(...)):
-    if session_id not in sessions:
+    if not await IO_EXECUTOR.run(session_store.exists, session_id):
         raise HTTPException(status_code=404, detail="Invalid session_id")
-    content = await file.read()
+    # Starlette has already spooled the multipart body to a temp file in chunks;
+    # parse straight from that file instead of reading it all into memory
+    size = file.size
+    if size is None:
+        file.file.seek(0, os.SEEK_END)
+        size = file.file.tell()
+    file_parser, analyzer = await IO_EXECUTOR.run(upload_modules)
+    if size > file_parser.MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413, detail=f"Portfolio file exceeds the {file_parser.MAX_UPLOAD_BYTES} byte limit."
+        )
     try:
-        portfolio_data = parse_portfolio(file.filename, content)
-        sessions[session_id]["portfolio"] = portfolio_data
-        return {"message": "Portfolio uploaded", "session_id": session_id}
+        # Parsing (including the PDF process pool wait) runs off the event loop
+        with span("parse"):
+            portfolio_frame = await CPU_EXECUTOR.run(file_parser.parse_portfolio_frame, file.filename, file.file)
+        with span("analyze"):
+            analysis = await CPU_EXECUTOR.run(analyzer.analyze_portfolio, portfolio_frame)
+        portfolio_data = await CPU_EXECUTOR.run(portfolio_frame.to_dict, orient='records')
+        portfolio_key = await CPU_EXECUTOR.run(portfolio_hash, portfolio_data)
+        holdings = await CPU_EXECUTOR.run(analyzer.largest_holdings, portfolio_frame, HOLDING_NEWS_ASSETS)
+        prompt_holdings = await CPU_EXECUTOR.run(top_holdings, analysis)
+    except file_parser.PortfolioParseTimeoutError as pe:
+        raise HTTPException(status_code=504, detail=str(pe))
+    except file_parser.PortfolioTooLargeError as te:
+        raise HTTPException(status_code=413, detail=str(te))
+    except file_parser.PortfolioParseError as pe:
+        raise HTTPException(status_code=422, detail=str(pe))
+    except KeyError as ke:
+        raise HTTPException(status_code=400, detail=f"Portfolio is missing required column {ke}")
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
+    holding_news = await holding_news_for(holdings)
+    # Analysis and holding news are computed once per upload and reused until the next upload
+    try:
+        await IO_EXECUTOR.run(
+            session_store.update,
+            session_id,
+            portfolio=portfolio_data,
+            analysis=analysis,
+            top_holdings=prompt_holdings,
+            portfolio_hash=portfolio_key,
+            holding_news=holding_news,
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Invalid session_id")
+    except SessionTooLargeError as se:
+        raise HTTPException(status_code=413, detail=f"Portfolio is too large to keep in this session. {se}")
+    return {"message": "Portfolio uploaded", "session_id": session_id}
+
+
+def _save_batch_uploads(files, workdir):
+    """Copy spooled uploads to workdir so pool workers can open them by path."""
+    paths = []
+    for number, upload in enumerate(files):
+        # One directory per upload, so two uploads with the same name don't overwrite each other
+        directory = os.path.join(workdir, str(number))
+        os.mkdir(directory)
+        path = os.path.join(directory, os.path.basename(upload.filename or "portfolio"))
+        with open(path, "wb") as f:
+            shutil.copyfileobj(upload.file, f)
+        paths.append(path)
+    return batch_analysis.collect_tasks(paths)
+
+
+@app.post("/batch/analyze")
+async def batch_analyze(files: List[UploadFile] = File(...), details: bool = Form(False)):
+    """
+    Parse and analyze many portfolios (files or .zip archives) across a process pool.
+
+    Streams NDJSON: one {"portfolio", "ok", ...} record per portfolio as it
+    finishes, then a {"summary": ...} record with counts and the failures.
+    """
+    await batch_limiter.acquire()
+    workdir = tempfile.mkdtemp(prefix="batch_")
+    try:
+        tasks = await IO_EXECUTOR.run(_save_batch_uploads, files, workdir)
+    except BaseException as e:
+        shutil.rmtree(workdir, ignore_errors=True)
+        batch_limiter.release()
+        if isinstance(e, batch_analysis.BatchTooLargeError):
+            raise HTTPException(status_code=413, detail=str(e))
+        if isinstance(e, Exception):
+            raise HTTPException(status_code=400, detail=f"Could not read batch: {e}")
+        raise
+
+    async def records():
+        # Waiting on the pool happens in a thread; the batch slot is held until the stream ends
+        try:
+            async for record in iterate_in_threadpool(batch_analysis.run_batch(tasks, include_details=details)):
+                if "summary" not in record:
+                    BATCH_PORTFOLIOS.inc(outcome="ok" if record["ok"] else "failed")
+                yield json.dumps(record, default=str) + "\n"
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+            batch_limiter.release()
+
+    return StreamingResponse(records(), media_type="application/x-ndjson")
+
+
+async def prepare_chat_prompt(session_id: str, question: str, use_cache: bool = True):
+    """
+    Validate a chat turn, consult the answer cache and build the LLM prompt.
+
+    Returns:
+        tuple: (session dict, prompt string or None on a cache hit,
+                cached answer or None, answer-cache key as (bucket, question vector))
+    """
+    session = await IO_EXECUTOR.run(session_store.get, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Invalid session_id")
+    if not question:
+        raise HTTPException(status_code=400, detail="Question cannot be empty.")
+
+    portfolio_data = session.get("portfolio")
+    if not portfolio_data:
+        raise HTTPException(status_code=400, detail="Upload a portfolio first for this session.")
+
+    # Get RAG context from news
+    with span("news_search"):
+        context = await news_impact_query(question)
+    if not context:
+        raise HTTPException(status_code=404, detail="No relevant context found.")
+
+    # The question embedding from the news search doubles as the cache key
+    cache_key = ((session.get("portfolio_hash"), context["index_generation"]), context["query_vector"])
+    if use_cache:
+        with span("answer_cache_lookup"):
+            cached_answer = answer_cache.lookup(*cache_key)
+        if cached_answer is not None:
+            print(f"[chat] session {session_id}: answer cache hit")
+            return session, None, cached_answer, cache_key
+    else:
+        answer_cache.record_bypass()
+
+    holding_news = session.get("holding_news")
+    if holding_news and holding_news.get("assets") and holding_news.get("generation") != context["index_generation"]:
+        holding_news = await holding_news_for(holding_news["assets"])
+        if holding_news["generation"] is not None:
+            session["holding_news"] = holding_news
+            try:
+                await IO_EXECUTOR.run(session_store.update, session_id, holding_news=holding_news)
+            except KeyError:
+                raise HTTPException(status_code=404, detail="Invalid session_id")
+
+    with span("prompt_build"):
+        prompt, prompt_stats = build_chat_prompt(session, question, context["relevant_news"])
+    print(
+        f"[chat] session {session_id}: prompt ~{prompt_stats['tokens']} tokens "
+        f"({prompt_stats['chars']} chars, budget {prompt_stats['budget']}, "
+        f"{prompt_stats['recent_messages']} recent messages, "
+        f"{prompt_stats['summarized_messages']} summarized, "
+        f"{prompt_stats['degradation_steps']} trim steps)"
+    )
+    return session, prompt, None, cache_key
+
+
+def save_chat_turn(session_id: str, session, question: str, answer: str):
+    """Append a question/answer pair and persist it with the rolling summary."""
+    session["history"].append({"role": "user", "content": question})
+    session["history"].append({"role": "assistant", "content": answer})
+    session_store.update(
+        session_id,
+        history=session["history"],
+        history_summary=session.get("history_summary", ""),
+        summarized_messages=session.get("summarized_messages", 0),
+    )
 
 
 @app.post("/chat/ask")
-async def chat_ask(session_id: str = Form(...), question: str = Form(...)):
+@chat_limiter.admit
+async def chat_ask(session_id: str = Form(...), question: str = Form(...), no_cache: bool = Form(False)):
     try:
-        if session_id not in sessions:
-            raise HTTPException(status_code=404, detail="Invalid session_id")
-        if not question:
-            raise HTTPException(status_code=400, detail="Question cannot be empty.")
-
-        session = sessions[session_id]
-        portfolio_data = session.get("portfolio")
-        if not portfolio_data:
-            raise HTTPException(status_code=400, detail="Upload a portfolio first for this session.")
-
-        # Analyze portfolio fresh each time for simplicity
-        analysis = analyze_portfolio(portfolio_data)
-
-        # Get RAG context from news
-        context = news_impact_query(question)
-        if not context:
-            raise HTTPException(status_code=404, detail="No relevant context found.")
-
-        # Build prompt with history for context
-        chat_history_text = "\n".join([f"{turn['role'].capitalize()}: {turn['content']}" for turn in session["history"]])
-        prompt = f"""You are an expert financial analyst. Use the conversation so far, the portfolio analysis, and the news context to answer the user's question.
-    Conversation so far:
-    {chat_history_text}
-
-    Portfolio analysis:
-    {analysis}
-
-    News context (list of dicts with title/link/summary):
-    {context}
-
-    User question: {question}
-    Provide a clear, helpful, portfolio-aware answer. If context is insufficient, say what more you need."""
-        
-        print("-----------------")
-        print("Waiting for Ollama reply")
-
-        answer = ask_ollama(prompt)
-        if not answer:
-            answer = (
-                "I'm unable to generate an LLM response right now. "
-                "Please ensure the LLM service is available or try again later."
-            )
+        session, prompt, answer, cache_key = await prepare_chat_prompt(session_id, question, use_cache=not no_cache)
+        cached = answer is not None
+
+        if not cached:
+            print("-----------------")
+            print("Waiting for Ollama reply")
+
+            answer = await ask_ollama(prompt)
+            if answer:
+                answer_cache.store(*cache_key, answer)
+                CHAT_ANSWERS.inc(source="llm")
+            else:
+                answer = LLM_UNAVAILABLE_ANSWER
+                CHAT_ANSWERS.inc(source="fallback")
+        else:
+            CHAT_ANSWERS.inc(source="cache")
 
         # Save to history
-        session["history"].append({"role": "user", "content": question})
-        session["history"].append({"role": "assistant", "content": answer})
+        with span("session_save"):
+            await IO_EXECUTOR.run(save_chat_turn, session_id, session, question, answer)
 
         print("-----------response generated---------")
-        return {"answer": answer, "history": session["history"]}
+        return {"answer": answer, "history": session["history"], "cached": cached}
     except Exception as e:
         print(f"Error occured in method chat_ask : {e}")
 
 
+@app.post("/chat/ask/stream")
+async def chat_ask_stream(session_id: str = Form(...), question: str = Form(...), no_cache: bool = Form(False)):
+    """
+    Stream an answer as newline-delimited JSON while Ollama generates it.
+
+    Each line is one event: {"type": "token", "content": ...} for every
+    fragment, then {"type": "done", "answer": ..., "history": [...]} once the
+    answer is complete and saved to the session history. A failure midway
+    ends the stream with {"type": "error", "detail": ...}. A cached answer
+    arrives as a single token event and "cached": true on the done event.
+    """
+    # The chat slot is held until the stream ends, not just until the response starts
+    await chat_limiter.acquire()
+    try:
+        session, prompt, cached_answer, cache_key = await prepare_chat_prompt(
+            session_id, question, use_cache=not no_cache
+        )
+    except BaseException:
+        chat_limiter.release()
+        raise
+
+    async def events():
+        try:
+            async for event in answer_events():
+                yield event
+        finally:
+            chat_limiter.release()
+
+    async def answer_events():
+        if cached_answer is not None:
+            CHAT_ANSWERS.inc(source="cache")
+            await IO_EXECUTOR.run(save_chat_turn, session_id, session, question, cached_answer)
+            yield json.dumps({"type": "token", "content": cached_answer}) + "\n"
+            yield json.dumps({"type": "done", "answer": cached_answer, "history": session["history"], "cached": True}) + "\n"
+            return
+
+        fragments = []
+        start = time.perf_counter()
+        try:
+            async for fragment in stream_ollama(prompt):
+                if not fragments:
+                    STAGE_SECONDS.observe(time.perf_counter() - start, stage="llm_first_token")
+                fragments.append(fragment)
+                yield json.dumps({"type": "token", "content": fragment}) + "\n"
+            LLM_REQUESTS.inc(mode="stream", outcome="ok")
+        except Exception as e:
+            LLM_REQUESTS.inc(mode="stream", outcome="error")
+            print(f"Error occured in method chat_ask_stream : {e}")
+            if fragments:
+                yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+                return
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage="llm")
+
+        answer = "".join(fragments)
+        if answer:
+            answer_cache.store(*cache_key, answer)
+            CHAT_ANSWERS.inc(source="llm")
+        else:
+            answer = LLM_UNAVAILABLE_ANSWER
+            CHAT_ANSWERS.inc(source="fallback")
+            yield json.dumps({"type": "token", "content": answer}) + "\n"
+
+        # History is only written once the full answer has been streamed
+        await IO_EXECUTOR.run(save_chat_turn, session_id, session, question, answer)
+        yield json.dumps({"type": "done", "answer": answer, "history": session["history"], "cached": False}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.get("/chat/analysis/{session_id}")
+def get_analysis(session_id: str):
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Invalid session_id")
+    analysis = session.get("analysis")
+    if analysis is None:
+        raise HTTPException(status_code=400, detail="Upload a portfolio first for this session.")
+    return {"analysis": analysis}
+
+
+@app.get("/chat/cache/stats")
+def answer_cache_stats():
+    """Answer cache size, hit/miss/bypass counts and hit rate."""
+    return answer_cache.stats()
+
+
 @app.get("/chat/history/{session_id}")
 def get_history(session_id: str):
-    if session_id not in sessions:
+    session = session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Invalid session_id")
-    return {"history": sessions[session_id]["history"]}
+    return {"history": session["history"]}
 
 
 @app.get("/search-news/")
+@search_limiter.admit
 async def search_news(query: str, top_k: int = 5, threshold: float = 2.0):
     """
     Search for relevant news articles based on a query.
@@ -236,11 +712,11 @@ async def search_news(query: str, top_k: int = 5, threshold: float = 2.0):
         raise HTTPException(status_code=400, detail="Query cannot be empty.")
     
     try:
-        engine = get_news_engine()
-        results = engine.search_relevant_news(query, top_k=top_k, threshold=threshold)
+        results, generation = await batched_news_search(query, top_k=top_k, threshold=threshold)
         return {
             "query": query,
             "results_count": len(results),
+            "index_generation": generation,
             "news_articles": results
         }
     except Exception as e:
@@ -248,30 +724,67 @@ async def search_news(query: str, top_k: int = 5, threshold: float = 2.0):
 
 
 @app.get("/search-news/company/{company_name}")
+@search_limiter.admit
 async def search_news_by_company(company_name: str, top_k: int = 5):
     """
     Search for news articles related to a specific company.
     
     Args:
-        company_name (str): Name of the company to search for
+        company_name (str): Name, ticker or alias of the company to search for
         top_k (int): Number of top results to return (default: 5)
     
     Returns:
         dict: Dictionary containing the relevant news articles
     """
     try:
-        engine = get_news_engine()
-        results = engine.search_by_company(company_name, top_k=top_k)
+        results, generation = await company_news_search([company_name], top_k=top_k)
+        results = results[company_name]
         return {
             "company": company_name,
             "results_count": len(results),
+            "index_generation": generation,
             "news_articles": results
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching news: {str(e)}")
 
 
+@app.get("/search-news/portfolio/{session_id}")
+@search_limiter.admit
+async def search_news_by_portfolio(session_id: str, top_k: int = 3):
+    """
+    News for every asset in a session's portfolio in one call.
+
+    Args:
+        session_id (str): Session with an uploaded portfolio
+        top_k (int): Number of results per asset (default: 3)
+
+    Returns:
+        dict: Dictionary mapping each asset to its relevant news articles
+    """
+    session = await IO_EXECUTOR.run(session_store.get, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Invalid session_id")
+    portfolio = session.get("portfolio")
+    if portfolio is None:
+        raise HTTPException(status_code=400, detail="Upload a portfolio first for this session.")
+    # One pass over every lot; large portfolios make this worth keeping off the event loop
+    assets = await CPU_EXECUTOR.run(lambda: list(dict.fromkeys(str(item["Asset"]) for item in portfolio)))
+    try:
+        results, generation = await company_news_search(assets, top_k=top_k)
+        return {
+            "session_id": session_id,
+            "assets_count": len(assets),
+            "results_count": sum(len(articles) for articles in results.values()),
+            "index_generation": generation,
+            "news_by_asset": results
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching news: {str(e)}")
+
+
 @app.get("/search-news/topic/{topic}")
+@search_limiter.admit
 async def search_news_by_topic(topic: str, top_k: int = 5):
     """
     Search for news articles related to a specific topic.
@@ -284,17 +797,59 @@ async def search_news_by_topic(topic: str, top_k: int = 5):
         dict: Dictionary containing the relevant news articles
     """
     try:
-        engine = get_news_engine()
-        results = engine.search_by_topic(topic, top_k=top_k)
+        results, generation = await batched_news_search(topic, top_k=top_k)
         return {
             "topic": topic,
             "results_count": len(results),
+            "index_generation": generation,
             "news_articles": results
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching news: {str(e)}")
 
 
+@app.get("/search-news/stats")
+def search_news_stats():
+    """
+    Query batcher statistics.
+
+    Returns:
+        dict: Request/batch counts, p50/p99 latency in ms and batch-size figures
+    """
+    return query_batcher.stats()
+
+
+def _news_index_size():
+    engine = news_engine
+    return engine.index.ntotal if engine is not None else 0
+
+
+def _news_index_generation():
+    engine = news_engine
+    return engine.generation if engine is not None else 0
+
+
+Gauge("portfolio_sessions", "Chat sessions currently held by the session store.",
+      function=lambda: session_store.stats()["sessions"])
+Gauge("news_index_vectors", "Vectors in the news index being served.", function=_news_index_size)
+Gauge("news_index_generation", "Generation of the news index being served.", function=_news_index_generation)
+Gauge("news_model_loaded", "1 once the embedding model and news index are loaded.",
+      function=lambda: news_engine is not None)
+Gauge("news_store_articles", "Articles in the news store.", function=lambda: len(news_store))
+Gauge("news_duplicates_collapsed", "Near-duplicate articles dropped at ingest by this process.",
+      function=lambda: news_store.dedup_stats()["duplicates"])
+Gauge("news_paragraphs_collapsed", "Repeated paragraphs dropped from articles at ingest by this process.",
+      function=lambda: news_store.dedup_stats()["paragraphs"])
+Gauge("news_query_queue_depth", "News searches waiting for the query batcher.",
+      function=lambda: query_batcher.stats()["queue_depth"])
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: request and stage latency histograms, counters and gauges."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, port=8000)
@@ -0,0 +1,27 @@
+import io
+import json
+
+from utils.analyzer import analyze_portfolio_frame
+from utils.file_parser import parse_portfolio_frame
+
+BLANK_CELLS_CSV = b"""Asset,Type,Invested_Amount,Current_Value,Date
+INFY,,50000,60000,2023-02-01
+HDFC Balanced,Mutual Fund,30000,,2023-06-01
+Bitcoin,Crypto,10000,9000,2024-01-01
+"""
+
+
+def test_blank_cells_give_json_compliant_analysis():
+    frame = parse_portfolio_frame("portfolio.csv", io.BytesIO(BLANK_CELLS_CSV))
+    analysis = analyze_portfolio_frame(frame, as_of="2026-01-01")
+
+    # Raises on NaN, like the API response encoder
+    json.dumps(analysis, allow_nan=False)
+
+    assert analysis["Total_Current"] == 69000.0
+    assert analysis["Asset_Diversification"][0]["Asset_Type"] is None
+    rows = analysis["Detailed_Assets"]
+    assert rows[0]["Type"] is None
+    assert rows[1]["Current_Value"] is None
+    assert rows[1]["ROI (%)"] is None
+    assert [row["Asset"] for row in analysis["Asset_Returns"]] == ["INFY", "Bitcoin"]
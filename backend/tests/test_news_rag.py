@@ -0,0 +1,34 @@
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache
+from utils.news_rag import NewsRAGEngine
+
+
+class FakeEncoder:
+    name = "fake"
+    dimension = 4
+
+    def encode(self, texts, batch_size=64):
+        return np.array([[len(text), i, 1.0, 2.0] for i, text in enumerate(texts)], dtype="float32")
+
+
+def make_engine(cache_path, max_entries):
+    engine = NewsRAGEngine.__new__(NewsRAGEngine)
+    engine.encoder = FakeEncoder()
+    engine.model_name = engine.encoder.name
+    engine.batch_size = 64
+    engine.embedding_cache = EmbeddingCache(str(cache_path), max_entries=max_entries)
+    return engine
+
+
+def test_embed_articles_larger_than_cache_has_no_missing_rows(tmp_path):
+    engine = make_engine(tmp_path / "embedding_cache.npz", max_entries=8)
+    articles = [{"title": f"Story {i}", "summary": "x" * i} for i in range(10)]
+
+    for _ in range(2):
+        embeddings = engine.embed_articles(articles)
+        assert embeddings.shape == (10, 4)
+        assert not np.isnan(embeddings).any()
+        assert embeddings[:, 2].tolist() == [1.0] * 10
+
+    assert len(EmbeddingCache(str(tmp_path / "embedding_cache.npz"))) == 8
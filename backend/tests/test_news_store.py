@@ -0,0 +1,30 @@
+from utils.news_store import NewsStore
+
+DAILY_TITLE = "Stocks to buy or sell today: top trading ideas from market experts for {day}"
+# Only the day differs, so the texts estimate above the default 0.8 near-duplicate threshold
+DAILY_SUMMARY = ("Analysts recommend these stocks to buy or sell today as benchmark indices Nifty50 and Sensex "
+                 "look set for a cautious start amid mixed global cues, with FII flows and crude prices in focus "
+                 "for traders this session.")
+
+
+def daily(day, date, link):
+    return {"title": DAILY_TITLE.format(day=day), "summary": DAILY_SUMMARY,
+            "link": link, "published": date}
+
+
+def test_templated_daily_articles_are_kept(tmp_path):
+    store = NewsStore(str(tmp_path / "news_store.db"))
+    added = store.append([
+        daily("Monday", "2026-10-12T03:30:00+00:00", "https://news.example.com/ideas-monday"),
+        daily("Tuesday", "2026-10-13T03:30:00+00:00", "https://news.example.com/ideas-tuesday"),
+        daily("Wednesday", "2026-10-14T03:30:00+00:00", "https://news.example.com/ideas-wednesday"),
+    ])
+    assert added == 3
+
+
+def test_syndicated_copy_on_the_same_day_is_collapsed(tmp_path):
+    store = NewsStore(str(tmp_path / "news_store.db"))
+    original = daily("Monday", "2026-10-12T03:30:00+00:00", "https://news.example.com/ideas-monday")
+    copy = {**original, "title": f"UPDATE 1-{original['title']}", "link": "https://wire.example.com/ideas",
+            "published": "2026-10-12T05:00:00+00:00"}
+    assert store.append([original, copy]) == 1
@@ -1,39 +1,107 @@
 # backend/utils/analyzer.py
-def analyze_portfolio(portfolio_data: list):
-    total_invested = 0
-    total_current = 0
-    asset_type_summary = {}
+import numpy as np
+import pandas as pd
 
-    for item in portfolio_data:
-        invested = float(item['Invested_Amount'])
-        current = float(item['Current_Value'])
-        asset_type = item['Type']
+from utils.returns import nan_to_none, time_weighted_returns
 
-        total_invested += invested
-        total_current += current
 
-        # ROI per asset
-        item['ROI (%)'] = round(((current - invested) / invested) * 100, 2)
+def analyze_portfolio(portfolio_data, as_of=None):
+    """
+    Compute ROI, totals and asset-type diversification for a portfolio, plus
+    CAGR and XIRR per asset, per type and overall when lots carry a Date.
 
-        # Summarize asset type totals
-        if asset_type not in asset_type_summary:
-            asset_type_summary[asset_type] = 0
-        asset_type_summary[asset_type] += current
+    Accepts either the list of row dicts produced by parse_portfolio or the
+    DataFrame from parse_portfolio_frame; both go through the same
+    vectorized path.
+    """
+    if isinstance(portfolio_data, pd.DataFrame):
+        frame = portfolio_data
+    else:
+        frame = pd.DataFrame.from_records(portfolio_data)
+    return analyze_portfolio_frame(frame, as_of=as_of)
+
+
+def analyze_portfolio_frame(frame: pd.DataFrame, include_details=True, as_of=None):
+    """
+    Vectorized analysis over the portfolio columns.
+
+    Building the Detailed_Assets row dicts is most of the cost for large
+    portfolios; pass include_details=False when only the aggregates are
+    needed. as_of is the valuation date for the time-weighted returns
+    (default: PORTFOLIO_VALUATION_DATE or today).
+    """
+    invested = pd.to_numeric(frame['Invested_Amount']).to_numpy(dtype='float64')
+    current = pd.to_numeric(frame['Current_Value']).to_numpy(dtype='float64')
+
+    # A blank amount counts as nothing in the totals
+    total_invested = float(np.nansum(invested))
+    total_current = float(np.nansum(current))
+
+    # ROI per asset; undefined (None) where nothing was invested or an amount is blank
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.round((current - invested) / invested * 100, 2)
+    roi_values = roi.tolist()
+    for row in np.flatnonzero(~np.isfinite(roi)):
+        roi_values[row] = None
+
+    # Summarize asset type totals, keeping first-seen order of types
+    type_codes, asset_types = pd.factorize(frame['Type'], use_na_sentinel=False)
+    type_totals = np.bincount(type_codes, weights=np.nan_to_num(current), minlength=len(asset_types))
 
     # Calculate asset type diversification %
     diversification = []
-    for asset_type, value in asset_type_summary.items():
+    for asset_type, value in zip(nan_to_none(asset_types.tolist()), type_totals.tolist()):
         diversification.append({
             "Asset_Type": asset_type,
             "Value": value,
-            "Percentage": round((value / total_current) * 100, 2)
+            "Percentage": round((value / total_current) * 100, 2) if total_current else 0.0
         })
-    print (total_current, total_invested, diversification)
+
+    portfolio_roi = None
+    if total_invested:
+        portfolio_roi = round(((total_current - total_invested) / total_invested) * 100, 2)
+
+    extra_columns = {'ROI (%)': roi_values}
+    returns = {}
+    if 'Date' in frame.columns:
+        returns = time_weighted_returns(frame, invested, current, as_of)
+        extra_columns['CAGR (%)'] = returns.pop("lot_cagr")
+
     return {
         "Total_Invested": total_invested,
         "Total_Current": total_current,
         "Total_Profit_Loss": total_current - total_invested,
-        "Portfolio_ROI (%)": round(((total_current - total_invested) / total_invested) * 100, 2),
+        "Portfolio_ROI (%)": portfolio_roi,
         "Asset_Diversification": diversification,
-        "Detailed_Assets": portfolio_data
+        **returns,
+        "Detailed_Assets": _records_with(frame, extra_columns) if include_details else None
     }
+
+
+def largest_holdings(frame: pd.DataFrame, limit):
+    """
+    Asset names ordered by total current value, largest first.
+
+    Args:
+        frame (pd.DataFrame): Parsed portfolio
+        limit (int): Maximum number of assets returned
+
+    Returns:
+        list: Up to limit distinct asset names as strings
+    """
+    current = pd.to_numeric(frame['Current_Value'], errors='coerce').fillna(0.0)
+    totals = current.groupby(frame['Asset'].astype(str), sort=False).sum()
+    return totals.nlargest(limit).index.tolist()
+
+
+def _records_with(frame, extra_columns):
+    # Zipping plain column lists is several times faster than DataFrame.to_dict
+    columns = [column for column in frame.columns if column not in extra_columns]
+    values = [
+        nan_to_none(frame[column].tolist()) if frame[column].hasnans else frame[column].tolist()
+        for column in columns
+    ]
+    for column, column_values in extra_columns.items():
+        columns.append(column)
+        values.append(column_values)
+    return [dict(zip(columns, row)) for row in zip(*values)]
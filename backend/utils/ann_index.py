@@ -0,0 +1,194 @@
+import math
+import os
+
+import faiss
+import numpy as np
+
+# Which FAISS index the news engine builds: flat, ivf, hnsw, ivfpq, ivfsq8, pq, sq8
+NEWS_INDEX_TYPE = os.getenv("NEWS_INDEX_TYPE", "flat").lower()
+NEWS_INDEX_NLIST = int(os.getenv("NEWS_INDEX_NLIST", "0"))  # 0 = about 4 * sqrt(n)
+NEWS_INDEX_NPROBE = int(os.getenv("NEWS_INDEX_NPROBE", "16"))
+NEWS_HNSW_M = int(os.getenv("NEWS_HNSW_M", "32"))
+NEWS_HNSW_EF_SEARCH = int(os.getenv("NEWS_HNSW_EF_SEARCH", "64"))
+NEWS_PQ_M = int(os.getenv("NEWS_PQ_M", "0"))  # 0 = largest of 48/32/16/8 dividing the dimension
+# Trained indexes are updated in place until the rows added or expired since training reach this
+# fraction of the rows they were trained on, then retrained
+NEWS_INDEX_RETRAIN_DRIFT = float(os.getenv("NEWS_INDEX_RETRAIN_DRIFT", "0.5"))
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq", "ivfsq8", "pq", "sq8")
+
+# Below these corpus sizes the trained variants are not worth it (or can't train); use flat
+MIN_POINTS_PER_CENTROID = 39
+MIN_NLIST = 8
+MIN_PQ_TRAINING_POINTS = 256 * 39
+
+
+def _nlist_for(n):
+    if NEWS_INDEX_NLIST:
+        return NEWS_INDEX_NLIST
+    # About 4 * sqrt(n), capped so every centroid gets enough training points
+    return min(int(4 * math.sqrt(n)), n // MIN_POINTS_PER_CENTROID)
+
+
+def _pq_m_for(dim):
+    if NEWS_PQ_M:
+        return NEWS_PQ_M
+    return next((m for m in (48, 32, 16, 8) if dim % m == 0), 1)
+
+
+def factory_string(index_type, dim, n):
+    """
+    FAISS index_factory description for an index type and corpus size.
+
+    Falls back to "Flat" when the corpus is too small to train the
+    requested structure.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}; expected one of {', '.join(INDEX_TYPES)}")
+    if n == 0:
+        return "Flat"
+    nlist = _nlist_for(n)
+    if index_type in ("ivf", "ivfpq", "ivfsq8") and (nlist < MIN_NLIST or n < nlist * MIN_POINTS_PER_CENTROID):
+        return "Flat"
+    if index_type in ("ivfpq", "pq") and n < MIN_PQ_TRAINING_POINTS:
+        return "Flat"
+    return {
+        "flat": "Flat",
+        "ivf": f"IVF{nlist},Flat",
+        "hnsw": f"HNSW{NEWS_HNSW_M}",
+        "ivfpq": f"IVF{nlist},PQ{_pq_m_for(dim)}",
+        "ivfsq8": f"IVF{nlist},SQ8",
+        "pq": f"PQ{_pq_m_for(dim)}",
+        "sq8": "SQ8",
+    }[index_type]
+
+
+def configure_search(index, nprobe=NEWS_INDEX_NPROBE, ef_search=NEWS_HNSW_EF_SEARCH):
+    """Apply query-time parameters; ones that don't apply to the index type are skipped."""
+    params = faiss.ParameterSpace()
+    for name, value in (("nprobe", nprobe), ("efSearch", ef_search)):
+        try:
+            params.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass
+    return index
+
+
+def build_index(vectors, index_type=NEWS_INDEX_TYPE):
+    """
+    Build, train if needed, and fill an L2 index over float32 vectors.
+
+    Args:
+        vectors (np.ndarray): (n, dim) float32 embeddings
+        index_type (str): One of INDEX_TYPES
+
+    Returns:
+        faiss.Index: Searchable index with query-time parameters applied
+    """
+    n, dim = vectors.shape
+    index = faiss.index_factory(dim, factory_string(index_type, dim, n), faiss.METRIC_L2)
+    if not index.is_trained:
+        index.train(vectors)
+    _keep_direct_map(index)
+    if n:
+        index.add(vectors)
+    return configure_search(index)
+
+
+def _keep_direct_map(index):
+    # IVF indexes only reconstruct rows through a direct map; it is saved with the index
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and ivf.direct_map.no():
+        ivf.make_direct_map()
+
+
+def _copy(index):
+    # clone_index can't reset a memory-mapped index, so go through an owned serialized copy
+    return faiss.deserialize_index(faiss.serialize_index(index))
+
+
+def reconstruct_rows(index, rows):
+    """
+    Stored vectors of index rows, without re-encoding anything.
+
+    Exact for the indexes is_lossless() accepts, the quantized
+    approximation for the others.
+
+    Args:
+        index (faiss.Index): Index to read from
+        rows (list): Row numbers
+
+    Returns:
+        np.ndarray: (len(rows), dim) float32 vectors
+    """
+    if not len(rows):
+        return np.zeros((0, index.d), dtype="float32")
+    # Indexes persisted before direct maps were kept get one on first use; searches don't read it
+    _keep_direct_map(index)
+    return index.reconstruct_batch(np.asarray(rows, dtype="int64"))
+
+
+def update_index(index, kept_rows, vectors):
+    """
+    Copy of an index with only some rows kept and new vectors appended.
+
+    The trained quantizer and codebooks are reused as they are, so nothing
+    is retrained, and the original index is left untouched for readers.
+    When nothing expired the copy just gains the new vectors; otherwise the
+    kept rows are reconstructed and added back to an emptied copy.
+
+    Args:
+        index (faiss.Index): Current index
+        kept_rows (list): Rows to keep, in their new order
+        vectors (np.ndarray): (n, dim) float32 embeddings to append
+
+    Returns:
+        faiss.Index: Index whose rows are kept_rows followed by vectors
+    """
+    if len(kept_rows) == index.ntotal and list(kept_rows) == list(range(index.ntotal)):
+        updated = _copy(index)
+    else:
+        kept = reconstruct_rows(index, kept_rows)
+        updated = _copy(index)
+        updated.reset()
+        if len(kept):
+            updated.add(kept)
+    if len(vectors):
+        updated.add(vectors)
+    return configure_search(updated)
+
+
+def needs_training(index, trained_rows, drift, n, index_type=NEWS_INDEX_TYPE):
+    """
+    Whether an update should build and train a new index instead of using update_index().
+
+    Args:
+        index (faiss.Index): Current index
+        trained_rows (int): Rows the current index was trained on
+        drift (int): Rows added or expired since then, this update included
+        n (int): Rows after the update
+        index_type (str): One of INDEX_TYPES
+
+    Returns:
+        bool: True once drift passes NEWS_INDEX_RETRAIN_DRIFT, or when a corpus that was
+            too small to train has grown enough for index_type
+    """
+    if is_exact(index):
+        return factory_string(index_type, index.d, n) != "Flat"
+    if isinstance(faiss.downcast_index(index), faiss.IndexHNSW):
+        # A graph has nothing trained to go stale
+        return False
+    return drift > NEWS_INDEX_RETRAIN_DRIFT * max(trained_rows, 1)
+
+
+def is_exact(index):
+    """True for a plain flat index, whose stored vectors can be reconstructed exactly."""
+    return isinstance(faiss.downcast_index(index), faiss.IndexFlat)
+
+
+def is_lossless(index):
+    """True for indexes that store full vectors (flat, IVF-flat, HNSW-flat), so reconstruction is exact."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    return isinstance(index, (faiss.IndexFlat, faiss.IndexIVFFlat))
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000"))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+
+
+def portfolio_hash(portfolio_data):
+    """Stable hash of parsed portfolio records, used to scope cached answers."""
+    payload = json.dumps(portfolio_data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SemanticAnswerCache:
+    """
+    LLM answers reused across near-duplicate questions.
+
+    Answers are grouped in buckets keyed by (portfolio hash, news index
+    generation), so a different portfolio or a refreshed news index never
+    reuses an answer. Within a bucket, a question hits when the cosine
+    similarity of its embedding to a cached question reaches the threshold.
+    Conversation history is not part of the key. Eviction is LRU over all
+    entries.
+    """
+
+    def __init__(self, max_entries=ANSWER_CACHE_MAX_ENTRIES, threshold=ANSWER_CACHE_THRESHOLD):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        # entry_id -> (bucket, answer), in LRU order
+        self._entries = OrderedDict()
+        # bucket -> {"ids": [entry_id, ...], "vectors": float32 matrix of unit rows}
+        self._buckets = {}
+        self._next_id = 0
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype="float32").reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, bucket, question_vector):
+        """Return a cached answer for a near-duplicate question, or None."""
+        query = self._unit(question_vector)
+        with self._lock:
+            entries = self._buckets.get(bucket)
+            if entries is not None and entries["ids"]:
+                similarities = entries["vectors"] @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id = entries["ids"][best]
+                    self._entries.move_to_end(entry_id)
+                    self._hits += 1
+                    return self._entries[entry_id][1]
+            self._misses += 1
+            return None
+
+    def store(self, bucket, question_vector, answer):
+        vector = self._unit(question_vector)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (bucket, answer)
+            entries = self._buckets.setdefault(bucket, {"ids": [], "vectors": np.zeros((0, vector.size), dtype="float32")})
+            entries["ids"].append(entry_id)
+            entries["vectors"] = np.vstack([entries["vectors"], vector])
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id):
+        bucket, _ = self._entries.pop(entry_id)
+        entries = self._buckets[bucket]
+        position = entries["ids"].index(entry_id)
+        del entries["ids"][position]
+        entries["vectors"] = np.delete(entries["vectors"], position, axis=0)
+        if not entries["ids"]:
+            del self._buckets[bucket]
+
+    def record_bypass(self):
+        with self._lock:
+            self._bypassed += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "buckets": len(self._buckets),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "bypassed": self._bypassed,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+            }
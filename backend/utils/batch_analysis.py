@@ -0,0 +1,226 @@
+"""
+Analyze many portfolio files at once across a process pool.
+
+Files can be given directly, as directories, or inside zip archives. Results
+are produced one per portfolio as they finish, with a bounded number of
+portfolios in flight, followed by a summary record with the failures.
+
+Run from backend/:
+    python -m utils.batch_analysis clients/ more_clients.zip -o results.ndjson
+    python -m utils.batch_analysis portfolios.zip --workers 8 --details
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from io import BytesIO
+
+BATCH_WORKERS = int(os.getenv("BATCH_ANALYSIS_WORKERS", str(os.cpu_count() or 1)))
+# Portfolios submitted to the pool but not yet yielded; bounds memory held by pending results
+BATCH_MAX_IN_FLIGHT = int(os.getenv("BATCH_ANALYSIS_MAX_IN_FLIGHT", str(2 * BATCH_WORKERS)))
+BATCH_MAX_FILES = int(os.getenv("BATCH_ANALYSIS_MAX_FILES", "100000"))
+# Failed portfolio names listed in the summary; counts by error type are always complete
+BATCH_FAILURES_LISTED = int(os.getenv("BATCH_ANALYSIS_FAILURES_LISTED", "1000"))
+
+PORTFOLIO_EXTENSIONS = ('.csv', '.xlsx', '.xls', '.pdf')
+
+
+class BatchTooLargeError(ValueError):
+    """Raised when a batch holds more portfolio files than BATCH_MAX_FILES."""
+
+
+def collect_tasks(paths, max_files=BATCH_MAX_FILES):
+    """
+    Expand files, directories and zip archives into portfolio tasks.
+
+    Tasks only name where a portfolio is (path, and member for archives), so
+    workers read the files themselves and no contents pass through the pool.
+
+    Args:
+        paths (list): Portfolio files, directories or .zip archives
+        max_files (int): Reject batches with more portfolios than this
+
+    Returns:
+        list: (display name, path, zip member or None) tuples
+    """
+    tasks = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for filename in sorted(files):
+                    if filename.lower().endswith(PORTFOLIO_EXTENSIONS + ('.zip',)):
+                        tasks.extend(collect_tasks([os.path.join(root, filename)], max_files - len(tasks)))
+        elif path.lower().endswith('.zip'):
+            with zipfile.ZipFile(path) as archive:
+                for member in archive.infolist():
+                    if not member.is_dir() and member.filename.lower().endswith(PORTFOLIO_EXTENSIONS):
+                        tasks.append((f"{os.path.basename(path)}/{member.filename}", path, member.filename))
+        else:
+            tasks.append((os.path.basename(path), path, None))
+        if len(tasks) > max_files:
+            raise BatchTooLargeError(f"Batch has more than {max_files} portfolio files.")
+    return tasks
+
+
+def _init_worker():
+    from utils import file_parser
+
+    # Each batch worker already is one process; a PDF gets a single extraction process, there for the timeout
+    file_parser.PDF_PARSE_WORKERS = 1
+
+
+def analyze_task(task, include_details=False):
+    """
+    Parse and analyze one portfolio; runs in a worker process.
+
+    Returns:
+        dict: {"portfolio", "ok", "rows", "seconds", "analysis"} on success,
+            {"portfolio", "ok", "error", "message", "seconds"} on failure
+    """
+    from utils import analyzer, file_parser
+
+    name, path, member = task
+    start = time.perf_counter()
+    try:
+        if member is None:
+            if os.path.getsize(path) > file_parser.MAX_UPLOAD_BYTES:
+                raise file_parser.PortfolioTooLargeError(
+                    f"Portfolio file exceeds the {file_parser.MAX_UPLOAD_BYTES} byte limit.")
+            with open(path, "rb") as f:
+                frame = file_parser.parse_portfolio_frame(path.lower(), f)
+        else:
+            with zipfile.ZipFile(path) as archive:
+                # Checked before extracting, so a compressed bomb is never inflated
+                if archive.getinfo(member).file_size > file_parser.MAX_UPLOAD_BYTES:
+                    raise file_parser.PortfolioTooLargeError(
+                        f"Portfolio file exceeds the {file_parser.MAX_UPLOAD_BYTES} byte limit.")
+                content = BytesIO(archive.read(member))
+            frame = file_parser.parse_portfolio_frame(member.lower(), content)
+        analysis = analyzer.analyze_portfolio_frame(frame, include_details=include_details)
+        return {"portfolio": name, "ok": True, "rows": len(frame),
+                "seconds": round(time.perf_counter() - start, 4), "analysis": analysis}
+    except Exception as e:
+        # KeyError's str() is just the quoted key, so name the column explicitly
+        message = f"Portfolio is missing required column {e}" if isinstance(e, KeyError) else str(e)
+        return {"portfolio": name, "ok": False, "error": type(e).__name__, "message": message,
+                "seconds": round(time.perf_counter() - start, 4)}
+
+
+_pool = None
+
+
+def get_pool():
+    """The shared batch process pool, created on first use."""
+    global _pool
+    if _pool is None:
+        from utils.file_parser import PDF_MP_CONTEXT
+
+        # Not a fork: the server has executor, feed and batcher threads whose locks a fork would copy held
+        _pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS, initializer=_init_worker, mp_context=PDF_MP_CONTEXT)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_batch(tasks, pool=None, max_in_flight=BATCH_MAX_IN_FLIGHT, include_details=False):
+    """
+    Analyze portfolios across the process pool, yielding results as they finish.
+
+    At most max_in_flight portfolios are submitted at a time; the next one is
+    submitted only after a result has been yielded. The last record is a
+    summary: {"summary": {total, succeeded, failed, seconds, errors, failures}}.
+    Closing the generator early cancels portfolios that haven't started.
+
+    Args:
+        tasks (list): Tasks from collect_tasks
+        pool (Executor): Defaults to the shared pool from get_pool
+        max_in_flight (int): Portfolios submitted but not yet yielded
+        include_details (bool): Include Detailed_Assets rows in each analysis
+
+    Yields:
+        dict: One record per portfolio, then the summary
+    """
+    pool = pool or get_pool()
+    start = time.perf_counter()
+    pending = {}
+    succeeded = 0
+    errors = {}
+    failures = []
+    remaining = iter(tasks)
+    try:
+        while True:
+            for task in remaining:
+                pending[pool.submit(analyze_task, task, include_details)] = task[0]
+                if len(pending) >= max(1, max_in_flight):
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker itself died (e.g. killed for memory), not just the parse
+                    result = {"portfolio": name, "ok": False, "error": type(e).__name__, "message": str(e)}
+                if result["ok"]:
+                    succeeded += 1
+                else:
+                    errors[result["error"]] = errors.get(result["error"], 0) + 1
+                    if len(failures) < BATCH_FAILURES_LISTED:
+                        failures.append({"portfolio": result["portfolio"], "error": result["error"],
+                                         "message": result["message"]})
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
+
+    failed = sum(errors.values())
+    yield {"summary": {
+        "total": succeeded + failed,
+        "succeeded": succeeded,
+        "failed": failed,
+        "seconds": round(time.perf_counter() - start, 3),
+        "errors": errors,
+        "failures": failures,
+    }}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="Portfolio files, directories or .zip archives")
+    parser.add_argument("-o", "--output", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--max-in-flight", type=int, default=None)
+    parser.add_argument("--details", action="store_true", help="Include Detailed_Assets rows")
+    args = parser.parse_args()
+
+    from utils.file_parser import PDF_MP_CONTEXT
+
+    tasks = collect_tasks(args.paths)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 mp_context=PDF_MP_CONTEXT) as pool:
+            for record in run_batch(tasks, pool, args.max_in_flight or 2 * args.workers, args.details):
+                out.write(json.dumps(record, default=str) + "\n")
+                if "summary" in record:
+                    summary = record["summary"]
+                    print(f"[batch] {summary['succeeded']}/{summary['total']} portfolios analyzed, "
+                          f"{summary['failed']} failed in {summary['seconds']}s", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
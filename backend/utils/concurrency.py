@@ -0,0 +1,171 @@
+import asyncio
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import Counter, Gauge
+
+EXECUTOR_WORKERS = Gauge("executor_workers", "Threads in each stage executor.", ("executor",))
+EXECUTOR_ACTIVE = Gauge("executor_active_tasks", "Tasks running in each stage executor.", ("executor",))
+EXECUTOR_QUEUED = Gauge("executor_queue_depth", "Tasks waiting for a thread in each stage executor.", ("executor",))
+EXECUTOR_UTILIZATION = Gauge("executor_utilization", "Busy fraction of each stage executor's threads.", ("executor",))
+ADMISSION_IN_FLIGHT = Gauge("admission_in_flight", "Requests admitted and running, by route group.", ("route",))
+ADMISSION_QUEUED = Gauge("admission_queue_depth", "Requests waiting for admission, by route group.", ("route",))
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total", "Requests turned away by admission control.", ("route", "reason")
+)
+
+
+class Overloaded(Exception):
+    """
+    Raised when a route group is saturated.
+
+    status_code is 429 when the wait queue is already full and 503 when a
+    queued request was not admitted within the queue timeout.
+    """
+
+    def __init__(self, route, status_code, detail, retry_after=1):
+        super().__init__(detail)
+        self.route = route
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class StageExecutor:
+    """
+    A named, fixed-size thread pool for one kind of blocking work.
+
+    Separate pools keep a burst of one kind of work (e.g. parsing large
+    uploads) from taking every thread another stage needs. Queue depth,
+    active tasks and utilization are exported as labelled gauges.
+    """
+
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=f"{name}-stage")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        EXECUTOR_WORKERS.set(self.max_workers, executor=name)
+        self._publish()
+
+    def _publish(self):
+        EXECUTOR_ACTIVE.set(self._active, executor=self.name)
+        EXECUTOR_QUEUED.set(self._queued, executor=self.name)
+        EXECUTOR_UTILIZATION.set(self._active / self.max_workers, executor=self.name)
+
+    def _adjust(self, active=0, queued=0):
+        with self._lock:
+            self._active += active
+            self._queued += queued
+            self._publish()
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on this executor and await its result."""
+        def call():
+            self._adjust(active=1, queued=-1)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._adjust(active=-1)
+
+        self._adjust(queued=1)
+        future = self._executor.submit(call)
+        # A task cancelled before it started never runs call(), so take it off the queue here
+        future.add_done_callback(lambda f: f.cancelled() and self._adjust(queued=-1))
+        return await asyncio.wrap_future(future)
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.max_workers, "active": self._active, "queued": self._queued}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AdmissionLimiter:
+    """
+    Per-route-group concurrency limit with a bounded wait queue.
+
+    Up to max_concurrent requests run at once. Up to max_queue more wait for
+    a slot, first come first served; a request arriving to a full queue is
+    rejected at once with 429, and one that waits longer than queue_timeout
+    with 503. Used from the event loop only, so no locking is needed.
+
+    Use as `async with limiter:`, or call acquire() and release() when the
+    slot must outlive the handler (streamed responses).
+    """
+
+    def __init__(self, route, max_concurrent, max_queue, queue_timeout=10.0):
+        self.route = route
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters = deque()
+        self._publish()
+
+    def _publish(self):
+        ADMISSION_IN_FLIGHT.set(self._active, route=self.route)
+        ADMISSION_QUEUED.set(len(self._waiters), route=self.route)
+
+    async def acquire(self):
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self._publish()
+            return
+        if len(self._waiters) >= self.max_queue:
+            ADMISSION_REJECTED.inc(route=self.route, reason="queue_full")
+            raise Overloaded(self.route, 429, f"Too many {self.route} requests; try again shortly.")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as it gave up; pass the slot on
+                self.release()
+            else:
+                waiter.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                self._publish()
+            if isinstance(e, asyncio.TimeoutError):
+                ADMISSION_REJECTED.inc(route=self.route, reason="timeout")
+                raise Overloaded(self.route, 503, f"The server is busy with {self.route} requests; try again.")
+            raise
+
+    def release(self):
+        # The slot passes straight to the oldest live waiter, so _active doesn't change
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._publish()
+                return
+        self._active -= 1
+        self._publish()
+
+    def admit(self, handler):
+        """Decorator holding a slot for the whole of an async route handler."""
+        @functools.wraps(handler)
+        async def admitted(*args, **kwargs):
+            async with self:
+                return await handler(*args, **kwargs)
+        return admitted
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def stats(self):
+        return {"max_concurrent": self.max_concurrent, "max_queue": self.max_queue,
+                "in_flight": self._active, "queued": len(self._waiters)}
@@ -0,0 +1,155 @@
+import glob
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def content_key(title, summary, model_name=""):
+    """
+    Hash the text that gets embedded for an article.
+
+    The model name is part of the key so vectors from different encoders
+    never mix in the same cache file.
+    """
+    text = f"{title or ''} {summary or ''}".strip()
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk cache of article embeddings keyed by content hash.
+
+    Entries live in memory as an LRU-ordered dict and are written back to a
+    single .npz file with an atomic replace, so concurrent readers never see
+    a partially written cache. The file is only read on first use and can be
+    released with unload() once a build is done.
+
+    append() adds entries without reading or rewriting that file: they go
+    to a small segment file next to it, and segments are folded back into
+    the main file once there are more than max_segments of them.
+    """
+
+    def __init__(self, path, max_entries=50000, max_segments=16):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_segments = max_segments
+        self._loaded_vectors = None
+        # Segment files whose entries are in memory, removed once the main file holds them
+        self._loaded_segments = []
+        self._dirty = False
+
+    @property
+    def _vectors(self):
+        if self._loaded_vectors is None:
+            self._loaded_vectors = OrderedDict()
+            self.load()
+        return self._loaded_vectors
+
+    def unload(self):
+        """Write pending entries and drop the in-memory copy."""
+        self.save()
+        self._loaded_vectors = None
+        self._loaded_segments = []
+
+    def _segment_paths(self):
+        stem, ext = os.path.splitext(self.path)
+        # Names carry a fixed-width timestamp, so sorting them gives the order they were written in
+        return sorted(glob.glob(f"{glob.escape(stem)}.*{ext}"))
+
+    def load(self):
+        if not self.path:
+            return
+        segments = self._segment_paths()
+        for path in [self.path, *segments]:
+            if not os.path.exists(path):
+                continue
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    for key, vector in zip(data["keys"], data["vectors"]):
+                        key = str(key)
+                        self._vectors[key] = vector
+                        # Later segments hold the more recently used entries
+                        self._vectors.move_to_end(key)
+            except FileNotFoundError:
+                # Folded into the main file by another process since the listing
+                continue
+            except Exception as e:
+                print(f"Ignoring unreadable embedding cache {path}: {e}")
+                if path == self.path:
+                    self._vectors.clear()
+        self._loaded_segments = segments
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def __contains__(self, key):
+        return key in self._vectors
+
+    def get(self, key):
+        vector = self._vectors.get(key)
+        if vector is not None:
+            self._vectors.move_to_end(key)
+        return vector
+
+    def put(self, key, vector):
+        self._vectors[key] = np.asarray(vector, dtype="float32")
+        self._vectors.move_to_end(key)
+        self._dirty = True
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        while len(self._vectors) > self.max_entries:
+            self._vectors.popitem(last=False)
+        keys = np.array(list(self._vectors.keys()))
+        vectors = np.stack(list(self._vectors.values())) if self._vectors else np.zeros((0, 0), dtype="float32")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=keys, vectors=vectors)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        for path in self._loaded_segments:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._loaded_segments = []
+
+    def append(self, keys, vectors):
+        """
+        Add entries by writing them to a new segment file.
+
+        Unlike put() followed by save(), this never reads or rewrites the
+        main cache file, except to fold segments back in once there are
+        more than max_segments.
+
+        Args:
+            keys (list): Content keys
+            vectors (np.ndarray): One float32 row per key
+        """
+        if not self.path or not len(keys):
+            return
+        stem, ext = os.path.splitext(self.path)
+        segment = f"{stem}.{time.time_ns():016x}{os.getpid():08x}{ext}"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{segment}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=np.array(list(keys)), vectors=np.asarray(vectors, dtype="float32"))
+        os.replace(tmp_path, segment)
+
+        if self._loaded_vectors is not None:
+            for key, vector in zip(keys, vectors):
+                self._loaded_vectors[key] = np.asarray(vector, dtype="float32")
+                self._loaded_vectors.move_to_end(key)
+            self._loaded_segments.append(segment)
+        if len(self._segment_paths()) > self.max_segments:
+            # save() reads the main file and every segment first if they aren't loaded
+            was_loaded = self._loaded_vectors is not None
+            self._dirty = True
+            self.save()
+            if not was_loaded:
+                self.unload()
@@ -0,0 +1,198 @@
+import json
+import os
+import re
+
+import numpy as np
+
+# Which implementation embeds articles and queries: torch, int8 or onnx
+NEWS_ENCODER = os.getenv("NEWS_ENCODER", "torch").lower()
+# Where exported ONNX graphs (and their tokenizer) are kept between runs
+NEWS_ONNX_DIR = os.getenv(
+    "NEWS_ONNX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "onnx"),
+)
+
+ENCODER_BACKENDS = ("torch", "int8", "onnx")
+
+
+class Encoder:
+    """
+    Common interface for sentence encoders.
+
+    name identifies the model *and* the numeric path that produced the
+    vectors; it goes into embedding-cache and index-manifest keys, so
+    vectors from a quantized encoder never mix with full-precision ones.
+    """
+
+    name = None
+    dimension = None
+
+    def encode(self, texts, batch_size=64):
+        """
+        Args:
+            texts (list): Strings to embed
+            batch_size (int): Texts per forward pass
+
+        Returns:
+            np.ndarray: float32 matrix with one row per text
+        """
+        raise NotImplementedError
+
+
+class TorchEncoder(Encoder):
+    """The sentence-transformers model in PyTorch, optionally with int8 dynamic quantization."""
+
+    def __init__(self, model_name, quantize=False):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if quantize:
+            # Quantized kernels are CPU-only; Linear weights go to int8, activations are quantized per batch
+            model = SentenceTransformer(model_name, device="cpu")
+            self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self.name = f"{model_name}#int8"
+        else:
+            self.model = SentenceTransformer(model_name)
+            self.name = model_name
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts, batch_size=64):
+        vectors = self.model.encode(list(texts), batch_size=batch_size, convert_to_numpy=True)
+        return np.asarray(vectors, dtype="float32")
+
+
+def _pooling_config(model):
+    """Pooling mode and normalization of a SentenceTransformer, for re-implementing them outside torch."""
+    pooling, normalize = "mean", False
+    for module in model:
+        kind = type(module).__name__
+        if kind == "Pooling":
+            if hasattr(module, "get_pooling_mode_str"):
+                pooling = module.get_pooling_mode_str()
+            else:
+                pooling = getattr(module, "pooling_mode", pooling)
+        elif kind == "Normalize":
+            normalize = True
+    return pooling, normalize
+
+
+def export_onnx(model_name, directory):
+    """
+    Export a sentence-transformers model's transformer to ONNX, with its tokenizer.
+
+    Only the transformer runs in ONNX Runtime; pooling and normalization
+    are redone in numpy from the settings saved in encoder.json.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    pooling, normalize = _pooling_config(model)
+    if pooling not in ("mean", "cls"):
+        raise ValueError(f"ONNX encoder supports mean or cls pooling, not {pooling!r}")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+
+    os.makedirs(directory, exist_ok=True)
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = list(sample.keys())
+    tmp_path = os.path.join(directory, "model.onnx.tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            (dict(sample),),
+            tmp_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=14,
+        )
+    tokenizer.save_pretrained(directory)
+    with open(os.path.join(directory, "encoder.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "model": model_name,
+            "pooling": pooling,
+            "normalize": normalize,
+            "max_seq_length": model.max_seq_length,
+            "dimension": model.get_sentence_embedding_dimension(),
+        }, f)
+    os.replace(tmp_path, os.path.join(directory, "model.onnx"))
+
+
+class OnnxEncoder(Encoder):
+    """
+    The transformer exported to ONNX and run by ONNX Runtime on CPU.
+
+    The graph is exported on first use and reused after that; serving then
+    needs onnxruntime and the tokenizer but not torch.
+    """
+
+    def __init__(self, model_name, onnx_dir=NEWS_ONNX_DIR):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise RuntimeError("NEWS_ENCODER=onnx needs the onnxruntime package installed") from e
+        from transformers import AutoTokenizer
+
+        directory = os.path.join(onnx_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        if not os.path.exists(os.path.join(directory, "model.onnx")):
+            print(f"[encoders] Exporting {model_name} to ONNX in {directory}")
+            export_onnx(model_name, directory)
+        with open(os.path.join(directory, "encoder.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(directory, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(directory)
+        self.pooling = config["pooling"]
+        self.normalize = config["normalize"]
+        self.max_seq_length = config["max_seq_length"]
+        self.dimension = config["dimension"]
+        self.name = f"{model_name}#onnx"
+
+    def encode(self, texts, batch_size=64):
+        texts = list(texts)
+        out = np.zeros((len(texts), self.dimension), dtype="float32")
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                texts[start:start + batch_size], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np",
+            )
+            feeds = {name: value.astype("int64") for name, value in batch.items() if name in self.input_names}
+            hidden = self.session.run(["last_hidden_state"], feeds)[0]
+            if self.pooling == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = batch["attention_mask"][..., None].astype("float32")
+                pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            out[start:start + len(pooled)] = pooled
+        return out
+
+
+def load_encoder(model_name, backend=NEWS_ENCODER):
+    """
+    Build the encoder for a backend name.
+
+    Args:
+        model_name (str): sentence-transformers model name or path
+        backend (str): One of ENCODER_BACKENDS
+
+    Returns:
+        Encoder: Ready to encode
+    """
+    if backend == "torch":
+        return TorchEncoder(model_name)
+    if backend == "int8":
+        return TorchEncoder(model_name, quantize=True)
+    if backend == "onnx":
+        return OnnxEncoder(model_name)
+    raise ValueError(f"Unknown encoder backend {backend!r}; expected one of {', '.join(ENCODER_BACKENDS)}")
@@ -0,0 +1,214 @@
+import json
+import os
+import re
+from collections import defaultdict
+
+import numpy as np
+
+# Optional JSON file of {"Canonical Name": ["alias", "TICKER", ...]}
+ENTITY_ALIASES_PATH = os.getenv(
+    "NEWS_ENTITY_ALIASES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "entity_aliases.json"),
+)
+
+# Article fields scanned for mentions; a hit in the title ranks above one in the body
+ENTITY_FIELDS = (("title", 3), ("summary", 1), ("content", 1))
+
+# Legal-form words that never distinguish one company from another
+CORPORATE_SUFFIXES = frozenset({"ltd", "limited", "inc", "corp", "corporation", "co", "plc", "pvt", "private"})
+
+_TOKEN_RE = re.compile(r"[a-z0-9&]+")
+
+
+def tokenize(text):
+    """Lowercased word tokens with corporate suffixes dropped."""
+    return [token for token in _TOKEN_RE.findall((text or "").lower()) if token not in CORPORATE_SUFFIXES]
+
+
+def load_aliases(path=ENTITY_ALIASES_PATH):
+    """
+    Read the alias table, returning {} if there isn't one.
+
+    Returns:
+        dict: Canonical name -> list of aliases (the canonical name included)
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            table = json.load(f)
+        return {name: [name, *aliases] for name, aliases in table.items()}
+    except Exception as e:
+        print(f"Ignoring unreadable entity alias file {path}: {e}")
+        return {}
+
+
+class EntityIndex:
+    """
+    Inverted index from company names, tickers and aliases to article rows.
+
+    Built once when the news index is opened and carried forward with
+    updated() for each later snapshot, so only new articles are scanned.
+    Articles are scanned for every alias in the alias table, so a known
+    company resolves to its articles with one dictionary lookup. Names outside the table fall back to a phrase match:
+    the rows holding all of the phrase's tokens are intersected, then
+    checked for the tokens appearing in order.
+    """
+
+    def __init__(self, articles, aliases=None):
+        """
+        Args:
+            articles (list): Article dictionaries in index row order; None rows are skipped
+            aliases (dict): Canonical name -> aliases, as returned by load_aliases()
+        """
+        self._articles = articles
+        # alias token tuple -> canonical name
+        self._canonical = {}
+        for name, names in (aliases or {}).items():
+            for alias in names:
+                tokens = tuple(tokenize(alias))
+                if tokens:
+                    self._canonical.setdefault(tokens, name)
+        self._longest_alias = max((len(tokens) for tokens in self._canonical), default=0)
+
+        # token -> rows in ascending order, each row listed once; canonical name -> {row: score}
+        self._postings, self._entity_rows = self._scan(articles, range(len(articles)))
+
+    def _scan(self, articles, rows):
+        # Returns (token -> rows, canonical name -> {row: score}) for the given rows only
+        postings = defaultdict(list)
+        entity_rows = defaultdict(dict)
+        for row in rows:
+            article = articles[row]
+            if article is None:
+                continue
+            seen = set()
+            for field, weight in ENTITY_FIELDS:
+                tokens = tokenize(article.get(field))
+                for token in tokens:
+                    if token not in seen:
+                        seen.add(token)
+                        postings[token].append(row)
+                for start in range(len(tokens)):
+                    for length in range(1, min(self._longest_alias, len(tokens) - start) + 1):
+                        name = self._canonical.get(tuple(tokens[start:start + length]))
+                        if name is not None:
+                            scores = entity_rows[name]
+                            scores[row] = scores.get(row, 0) + weight
+        return postings, entity_rows
+
+    def updated(self, articles, kept_rows):
+        """
+        Index for the next snapshot, without rescanning articles already indexed.
+
+        Postings of kept rows are renumbered, expired rows are dropped and
+        only the new articles at the end are tokenized. This index is left
+        as it is for searches still reading it.
+
+        Args:
+            articles (list): The next snapshot's articles: this index's kept_rows in order, then new ones
+            kept_rows (list): Rows of this index that stay, in their new order
+
+        Returns:
+            EntityIndex: Index over articles
+        """
+        updated = EntityIndex.__new__(EntityIndex)
+        updated._articles = articles
+        updated._canonical = self._canonical
+        updated._longest_alias = self._longest_alias
+
+        if list(kept_rows) == list(range(len(self._articles))):
+            # Nothing expired: share the posting lists, copying only those the new rows extend
+            postings = dict(self._postings)
+            entity_rows = dict(self._entity_rows)
+        else:
+            # Old row -> new row, -1 for expired rows; rows stay ascending after renumbering
+            renumber = np.full(len(self._articles), -1, dtype=np.int64)
+            renumber[np.asarray(kept_rows, dtype=np.int64)] = np.arange(len(kept_rows))
+            postings = {}
+            for token, rows in self._postings.items():
+                moved = renumber[rows]
+                moved = moved[moved >= 0]
+                if len(moved):
+                    postings[token] = moved.tolist()
+            entity_rows = {}
+            for name, scores in self._entity_rows.items():
+                moved = {int(renumber[row]): score for row, score in scores.items() if renumber[row] >= 0}
+                if moved:
+                    entity_rows[name] = moved
+
+        new_postings, new_entity_rows = self._scan(articles, range(len(kept_rows), len(articles)))
+        for token, rows in new_postings.items():
+            postings[token] = postings.get(token, []) + rows
+        for name, scores in new_entity_rows.items():
+            entity_rows[name] = {**entity_rows.get(name, {}), **scores}
+        updated._postings = postings
+        updated._entity_rows = entity_rows
+        return updated
+
+    def __len__(self):
+        return len(self._postings)
+
+    def resolve(self, name):
+        """Canonical name for a company name, ticker or alias, or None if it isn't in the alias table."""
+        return self._canonical.get(tuple(tokenize(name)))
+
+    def lookup(self, name, limit=None):
+        """
+        Rows of articles that mention a company.
+
+        Args:
+            name (str): Company name, ticker or alias
+            limit (int): Keep only the best ranked rows
+
+        Returns:
+            list: Row numbers, title mentions and frequent mentions first, newer rows breaking ties
+        """
+        canonical = self.resolve(name)
+        if canonical is not None:
+            scores = self._entity_rows.get(canonical, {})
+        else:
+            scores = self._phrase_scores(tuple(tokenize(name)))
+        ranked = sorted(scores, key=lambda row: (scores[row], row), reverse=True)
+        return ranked[:limit] if limit is not None else ranked
+
+    def _phrase_scores(self, phrase):
+        if not phrase:
+            return {}
+        postings = [self._postings.get(token) for token in set(phrase)]
+        if not all(postings):
+            return {}
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+
+        scores = {}
+        size = len(phrase)
+        for row in candidates:
+            article = self._articles[row]
+            score = 0
+            for field, weight in ENTITY_FIELDS:
+                tokens = tokenize(article.get(field))
+                score += weight * sum(
+                    1 for start in range(len(tokens) - size + 1) if tuple(tokens[start:start + size]) == phrase
+                )
+            if score:
+                scores[row] = score
+        return scores
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Merge ranked row lists by reciprocal rank fusion.
+
+    Args:
+        rankings (list): Lists of rows, best first
+        k (int): Damping constant; 60 is the usual choice
+
+    Returns:
+        list: Rows ordered by fused score
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            scores[row] = scores.get(row, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda row: scores[row], reverse=True)
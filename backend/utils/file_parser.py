@@ -1,28 +1,226 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 import pandas as pd
 from io import BytesIO
-import pdfplumber
+
+REQUIRED_COLUMNS = ('Asset', 'Type', 'Invested_Amount', 'Current_Value')
+NUMERIC_DTYPES = {'Invested_Amount': 'float64', 'Current_Value': 'float64'}
+
+# Upload limits; a portfolio over either one is rejected with a 413
+MAX_UPLOAD_BYTES = int(os.getenv("PORTFOLIO_MAX_BYTES", str(50 * 1024 * 1024)))
+MAX_ROWS = int(os.getenv("PORTFOLIO_MAX_ROWS", "500000"))
+CSV_CHUNK_ROWS = int(os.getenv("PORTFOLIO_CSV_CHUNK_ROWS", "50000"))
+
+# PDF table extraction is spread over a process pool in page ranges
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+PDF_PARSE_TIMEOUT_SEC = float(os.getenv("PDF_PARSE_TIMEOUT_SEC", "60"))
+
+
+class PortfolioTooLargeError(ValueError):
+    """Raised when an uploaded portfolio exceeds the configured byte or row limit."""
+
+
+class PortfolioParseTimeoutError(TimeoutError):
+    """Raised when extracting tables from a document takes longer than allowed."""
+
+
+class PortfolioParseError(RuntimeError):
+    """Raised when a table extraction process dies (e.g. killed for memory) while reading a document."""
+
+
+def validate_columns(columns):
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"Portfolio is missing required columns: {', '.join(missing)}")
+
+
+def _check_row_limit(rows, max_rows):
+    if rows > max_rows:
+        raise PortfolioTooLargeError(f"Portfolio has more than {max_rows} rows.")
+
 
 def parse_portfolio(filename: str, file_content: bytes):
+    return parse_portfolio_frame(filename, file_content).to_dict(orient='records')
+
+
+def parse_portfolio_frame(filename: str, file_content, max_rows: int = MAX_ROWS) -> pd.DataFrame:
+    """
+    Parse an uploaded portfolio into a DataFrame, keeping it columnar for analysis.
+
+    Args:
+        filename (str): Original file name; the extension selects the parser
+        file_content (bytes or file object): Raw upload, or a seekable file holding it
+        max_rows (int): Reject portfolios with more data rows than this
+
+    Returns:
+        pd.DataFrame: One row per holding, with numeric amount columns
+    """
+    fileobj = BytesIO(file_content) if isinstance(file_content, (bytes, bytearray)) else file_content
+    fileobj.seek(0)
+
     if filename.endswith('.csv'):
-        df = pd.read_csv(BytesIO(file_content))
-        return df.to_dict(orient='records')
+        return _parse_csv(fileobj, max_rows)
+
+    elif filename.endswith('.xlsx'):
+        return _parse_xlsx(fileobj, max_rows)
 
-    elif filename.endswith('.xlsx') or filename.endswith('.xls'):
-        df = pd.read_excel(BytesIO(file_content))
-        return df.to_dict(orient='records')
+    elif filename.endswith('.xls'):
+        df = pd.read_excel(fileobj, dtype=NUMERIC_DTYPES)
+        validate_columns(df.columns)
+        _check_row_limit(len(df), max_rows)
+        return df
 
     elif filename.endswith('.pdf'):
-        with pdfplumber.open(BytesIO(file_content)) as pdf:
-            all_data = []
-            for page in pdf.pages:
-                table = page.extract_table()
-                if table:
-                    headers = table[0]
-                    for row in table[1:]:
-                        all_data.append(dict(zip(headers, row)))
-            if not all_data:
-                raise ValueError("No table found in PDF.")
-            return all_data
+        return _parse_pdf(fileobj, max_rows)
 
     else:
         raise ValueError("Unsupported file type. Only CSV, XLSX, and PDF supported.")
+
+
+def _parse_csv(fileobj, max_rows):
+    # Check the header before reading any data rows
+    validate_columns(pd.read_csv(fileobj, nrows=0).columns)
+    fileobj.seek(0)
+
+    chunks = []
+    rows = 0
+    with pd.read_csv(fileobj, chunksize=CSV_CHUNK_ROWS, dtype=NUMERIC_DTYPES) as reader:
+        for chunk in reader:
+            rows += len(chunk)
+            _check_row_limit(rows, max_rows)
+            chunks.append(chunk)
+    if not chunks:
+        return pd.DataFrame(columns=list(REQUIRED_COLUMNS))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _parse_xlsx(fileobj, max_rows):
+    # Imported here so CSV-only deployments don't need openpyxl loaded
+    from openpyxl import load_workbook
+
+    # read_only streams rows from the sheet XML instead of building the whole workbook
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = list(next(rows, ()))
+        validate_columns(headers)
+        data = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            data.append(row)
+            _check_row_limit(len(data), max_rows)
+    finally:
+        workbook.close()
+    return pd.DataFrame.from_records(data, columns=headers).astype(NUMERIC_DTYPES)
+
+
+# The server is multithreaded, so extraction processes come from a forkserver rather than a fork
+# of the server; it preloads pdfplumber and this module, so each process still starts quickly
+_PDF_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+PDF_MP_CONTEXT = multiprocessing.get_context(_PDF_START_METHOD)
+if _PDF_START_METHOD == "forkserver":
+    PDF_MP_CONTEXT.set_forkserver_preload(["pdfplumber", __name__])
+
+
+def _stop_pool(pool):
+    # Only this document's processes; other uploads have pools of their own
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_page_tables(pdf_path, start, stop):
+    """Extract the first table of each page in [start, stop); runs in a worker process."""
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        return [pdf.pages[number].extract_table() for number in range(start, stop)]
+
+
+def _parse_pdf(fileobj, max_rows, timeout=PDF_PARSE_TIMEOUT_SEC):
+    # pdfplumber (and pdfminer under it) is only loaded once a PDF is actually uploaded
+    import pdfplumber
+
+    # Workers open the document by path, so it is copied to disk once rather than pickled per task
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        shutil.copyfileobj(fileobj, tmp)
+        pdf_path = tmp.name
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+        ranges = [(start, min(start + PDF_PAGES_PER_TASK, page_count))
+                  for start in range(0, page_count, PDF_PAGES_PER_TASK)]
+
+        deadline = time.monotonic() + timeout
+        # Each document gets its own short-lived pool, even for a single page range: a thread
+        # can't be stopped at the deadline, but these processes can, without touching other uploads
+        pool = ProcessPoolExecutor(max_workers=max(1, min(PDF_PARSE_WORKERS, len(ranges))),
+                                   mp_context=PDF_MP_CONTEXT)
+        finished = False
+        try:
+            futures = [pool.submit(_extract_page_tables, pdf_path, start, stop) for start, stop in ranges]
+            page_tables = []
+            header_checked = False
+            # Collect in submission order so pages are reassembled in document order
+            for future in futures:
+                tables = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                if not header_checked:
+                    # Reject a document without the required columns before waiting for the rest of it
+                    header = next((table[0] for table in tables if table), None)
+                    if header is not None:
+                        validate_columns(header)
+                        header_checked = True
+                page_tables.append(tables)
+            finished = True
+        except FutureTimeoutError:
+            raise PortfolioParseTimeoutError(f"PDF table extraction exceeded {timeout:g}s.")
+        except BrokenProcessPool:
+            raise PortfolioParseError("PDF table extraction failed: a parser process exited unexpectedly.")
+        finally:
+            if finished:
+                pool.shutdown(wait=True)
+            else:
+                _stop_pool(pool)
+    finally:
+        os.remove(pdf_path)
+
+    return _assemble_pdf_tables([table for chunk in page_tables for table in chunk], max_rows)
+
+
+def _assemble_pdf_tables(tables, max_rows):
+    """
+    Merge per-page tables into one frame.
+
+    The first table's first row is the header. Later pages only drop their
+    first row when it repeats that header; continuation pages without a
+    header keep all their rows as data.
+    """
+    headers = None
+    all_data = []
+    for table in tables:
+        if not table:
+            continue
+        rows = table
+        if headers is None:
+            headers, rows = table[0], table[1:]
+        elif _normalize_row(table[0]) == _normalize_row(headers):
+            rows = table[1:]
+        for row in rows:
+            if any(cell not in (None, "") for cell in row):
+                all_data.append(dict(zip(headers, row)))
+        _check_row_limit(len(all_data), max_rows)
+    if not all_data:
+        raise ValueError("No table found in PDF.")
+    return pd.DataFrame.from_records(all_data)
+
+
+def _normalize_row(row):
+    return [(cell or "").strip().lower() for cell in row]
@@ -0,0 +1,107 @@
+import glob
+import json
+import os
+import uuid
+
+import faiss
+
+# Zero-copy mmap of flat index codes where the installed faiss supports it
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+
+def manifest_path_for(news_file_path):
+    stem, _ = os.path.splitext(news_file_path)
+    return f"{stem}.index.json"
+
+
+def save_index(manifest_path, index, keys, offsets, generation, model_name, index_type="flat", training=None):
+    """
+    Write an index and its row -> article offset table to disk.
+
+    training is stored as is and handed back by load_index(); the news
+    engine keeps the rows the index was trained on and the drift since there.
+
+    The index goes to a uniquely named file first and the manifest that
+    points at it is replaced last, so a reader always sees a matching
+    index/table pair. Index files no newer than the one the manifest pointed
+    at before are removed; workers that still have them mapped keep valid
+    pages until they reload. A file another worker has just written is newer
+    than that, so it survives even if that worker's manifest wins the race.
+    """
+    directory = os.path.dirname(manifest_path) or "."
+    stem = os.path.splitext(os.path.basename(manifest_path))[0]
+    index_name = f"{stem}.{uuid.uuid4().hex[:12]}.faiss"
+    index_path = os.path.join(directory, index_name)
+    faiss.write_index(index, f"{index_path}.tmp")
+    os.replace(f"{index_path}.tmp", index_path)
+
+    manifest = {
+        "index_file": index_name,
+        "generation": generation,
+        "model": model_name,
+        "index_type": index_type,
+        "ntotal": int(index.ntotal),
+        "training": training or {},
+        "rows": [{"key": key, "offset": offset} for key, offset in zip(keys, offsets)],
+    }
+    previous = _manifest_target(manifest_path)
+    tmp_manifest = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_manifest, manifest_path)
+
+    if previous is None:
+        return
+    try:
+        cutoff = os.stat(previous).st_mtime_ns
+    except OSError:
+        return
+    for old_path in glob.glob(os.path.join(directory, f"{stem}.*.faiss")):
+        if os.path.basename(old_path) == index_name:
+            continue
+        try:
+            if os.stat(old_path).st_mtime_ns <= cutoff:
+                os.remove(old_path)
+        except OSError:
+            pass
+
+
+def _manifest_target(manifest_path):
+    # Path of the index file a manifest points at, or None if there is no readable manifest
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            index_file = json.load(f)["index_file"]
+    except (OSError, ValueError, KeyError):
+        return None
+    return os.path.join(os.path.dirname(manifest_path) or ".", index_file)
+
+
+def load_index(manifest_path, model_name, index_type="flat"):
+    """
+    Open a persisted index memory-mapped.
+
+    Returns:
+        tuple: (index, rows, generation, training, mapped), or None if nothing usable is on disk;
+            mapped is False when the index type had to be read into memory instead
+    """
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("model") != model_name or manifest.get("index_type", "flat") != index_type:
+            return None
+        index_path = os.path.join(os.path.dirname(manifest_path) or ".", manifest["index_file"])
+        try:
+            index = faiss.read_index(index_path, MMAP_FLAGS)
+            mapped = True
+        except RuntimeError:
+            # Index types without mmap support are read into memory instead
+            index = faiss.read_index(index_path)
+            mapped = False
+        if index.ntotal != manifest["ntotal"] or index.ntotal != len(manifest["rows"]):
+            return None
+        return index, manifest["rows"], manifest["generation"], manifest.get("training", {}), mapped
+    except Exception as e:
+        print(f"Ignoring unreadable persisted index {manifest_path}: {e}")
+        return None
@@ -0,0 +1,242 @@
+"""
+Near-duplicate detection for news articles at ingest.
+
+Two passes: repeated paragraphs inside one article are dropped, then whole
+articles are compared by MinHash signatures of their word 3-shingles, with
+LSH band keys to find candidates. NewsStore.append uses both so that
+re-published variants of a story are collapsed into the first copy stored
+before anything is embedded or indexed.
+
+Run from backend/ to see how much a JSON article file would shrink:
+    python -m utils.news_dedup data/news_data.json data/news_articles.json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import zlib
+
+import numpy as np
+
+# Articles whose estimated Jaccard similarity reaches this are collapsed into the one stored first; 0 disables
+NEWS_DEDUP_THRESHOLD = float(os.getenv("NEWS_DEDUP_THRESHOLD", "0.8"))
+# Only articles dated within this many hours of each other are compared. Syndicated copies go out within
+# hours, while templated daily pieces ("... for Monday", "... for Tuesday") are a day apart; 0 compares everything
+NEWS_DEDUP_WINDOW_HOURS = float(os.getenv("NEWS_DEDUP_WINDOW_HOURS", "12"))
+# A paragraph is dropped when this fraction of its word pairs appears in one longer paragraph
+# of the same article; 0 disables
+NEWS_DEDUP_PARAGRAPH_CONTAINMENT = float(os.getenv("NEWS_DEDUP_PARAGRAPH_CONTAINMENT", "0.7"))
+
+# Signatures are persisted, so these are fixed rather than configurable
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above about 0.7 similarity almost always share a band
+LSH_BANDS = 16
+# Shingles hashed per MinHash chunk; bounds the NUM_PERM x chunk working array to about 32 MB
+SIGNATURE_CHUNK = 32768
+
+TEXT_FIELDS = ("title", "summary", "content")
+PARAGRAPH_FIELDS = ("summary", "content")
+
+WORD = re.compile(r"\w+")
+TAG = re.compile(r"<[^>]+>")
+# Newlines, and the literal "/n" some scraped sources leave behind (not the one in a URL like /news)
+PARAGRAPH_BREAK = re.compile(r"\s*(?:\n|(?:(?<=[\s.,;:!?])|^)/n)\s*")
+SENTENCE_END = re.compile(r"[.!?][\"'”’)\]]*$")
+
+_MASK64 = (1 << 64) - 1
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _splitmix64(x):
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+# Multiply-shift hash functions, derived without a random generator so they never change between versions
+PERM_A = np.array([_splitmix64(2 * i) | 1 for i in range(NUM_PERM)], dtype=np.uint64)
+PERM_B = np.array([_splitmix64(2 * i + 1) for i in range(NUM_PERM)], dtype=np.uint64)
+BAND_MIX = np.array([_splitmix64(NUM_PERM + i) | 1 for i in range(NUM_PERM // LSH_BANDS)], dtype=np.uint64)
+BAND_SALT = np.array([_splitmix64(2 * NUM_PERM + i) for i in range(LSH_BANDS)], dtype=np.uint64)
+
+
+def _tokens(text):
+    return WORD.findall(TAG.sub(" ", text).lower())
+
+
+def article_text(article):
+    """Title, summary and content of an article as one string."""
+    return " ".join(str(article.get(field) or "") for field in TEXT_FIELDS)
+
+
+def _shingle_hashes(tokens):
+    hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.uint64,
+                         count=len(tokens))
+    # Texts shorter than a shingle are one shingle of all their words
+    count = max(1, len(tokens) - SHINGLE_WORDS + 1)
+    combined = np.zeros(count, dtype=np.uint64)
+    for offset in range(min(SHINGLE_WORDS, len(tokens))):
+        combined = combined * _MIX + hashes[offset:offset + count]
+    return np.unique(combined ^ (combined >> np.uint64(31)))
+
+
+def signatures(texts):
+    """
+    MinHash signatures of many texts' word 3-shingles.
+
+    Tags are stripped and case is ignored, so an HTML-wrapped copy of a
+    story signs the same as the plain one. Shingles of all the texts are
+    hashed together in chunks, with np.minimum.reduceat taking each text's
+    minimum per hash function.
+
+    Args:
+        texts (list): Strings
+
+    Returns:
+        list: NUM_PERM uint32 values per text, None for a text without words
+    """
+    shingles = [_shingle_hashes(tokens) if tokens else None for tokens in map(_tokens, texts)]
+    result = [None] * len(texts)
+    rows = [row for row, hashes in enumerate(shingles) if hashes is not None]
+    start = 0
+    while start < len(rows):
+        # Whole texts per chunk; a single text longer than a chunk is hashed on its own
+        end, size = start, 0
+        while end < len(rows) and (end == start or size + len(shingles[rows[end]]) <= SIGNATURE_CHUNK):
+            size += len(shingles[rows[end]])
+            end += 1
+        chunk = [shingles[row] for row in rows[start:end]]
+        offsets = np.cumsum([0] + [len(hashes) for hashes in chunk[:-1]])
+        # uint64 arithmetic wraps, which is what multiply-shift hashing wants
+        hashed = (PERM_A[:, None] * np.concatenate(chunk)[None, :] + PERM_B[:, None]) >> np.uint64(32)
+        minima = np.minimum.reduceat(hashed, offsets, axis=1).astype(np.uint32).T
+        for row, sig in zip(rows[start:end], minima):
+            result[row] = sig
+        start = end
+    return result
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def band_keys(sig):
+    """
+    LSH keys of a signature, one per band.
+
+    Two texts are candidates when any of their keys match. Keys fit in a
+    signed 64-bit integer so they can be stored in SQLite.
+
+    Returns:
+        list: LSH_BANDS ints
+    """
+    bands = sig.reshape(LSH_BANDS, -1).astype(np.uint64)
+    keys = (bands * BAND_MIX).sum(axis=1, dtype=np.uint64) + BAND_SALT
+    return (keys >> np.uint64(1)).astype(np.int64).tolist()
+
+
+def _paragraphs(text):
+    # Pieces that stop mid-sentence (a break inside a sentence) are joined to the next one
+    paragraphs, current = [], []
+    for piece in PARAGRAPH_BREAK.split(text):
+        if piece:
+            current.append(piece)
+            if SENTENCE_END.search(piece):
+                paragraphs.append(" ".join(current))
+                current = []
+    if current:
+        paragraphs.append(" ".join(current))
+    return paragraphs
+
+
+def collapse_paragraphs(text, containment=NEWS_DEDUP_PARAGRAPH_CONTAINMENT):
+    """
+    Drop paragraphs repeated inside one text.
+
+    A paragraph goes when at least `containment` of its word pairs appear in
+    a single longer paragraph (or an earlier one of the same length), which
+    catches both exact repeats and a lead that is restated in full below.
+    Text with nothing to drop is returned unchanged.
+
+    Args:
+        text (str): Article summary or content
+        containment (float): Fraction of word pairs that must be covered; 0 disables
+
+    Returns:
+        tuple: (text, number of paragraphs dropped)
+    """
+    if not text or containment <= 0:
+        return text, 0
+    paragraphs = _paragraphs(text)
+    if len(paragraphs) < 2:
+        return text, 0
+
+    tokens = [_tokens(paragraph) for paragraph in paragraphs]
+    pairs = [set(zip(words, words[1:])) or {tuple(words)} for words in tokens]
+    kept = []
+    for i, paragraph in enumerate(paragraphs):
+        repeated = tokens[i] and any(
+            (len(tokens[j]) > len(tokens[i]) or (len(tokens[j]) == len(tokens[i]) and j < i))
+            and len(pairs[i] & pairs[j]) >= containment * len(pairs[i])
+            for j in range(len(paragraphs)) if j != i
+        )
+        if not repeated:
+            kept.append(paragraph)
+    if len(kept) == len(paragraphs):
+        return text, 0
+    return "\n".join(kept), len(paragraphs) - len(kept)
+
+
+def collapse_article_paragraphs(article, containment=NEWS_DEDUP_PARAGRAPH_CONTAINMENT):
+    """
+    collapse_paragraphs over an article's summary and content.
+
+    Returns:
+        tuple: (article, paragraphs dropped); a new dict only if something changed
+    """
+    removed = 0
+    changed = {}
+    for field in PARAGRAPH_FIELDS:
+        value = article.get(field)
+        if isinstance(value, str):
+            collapsed, dropped = collapse_paragraphs(value, containment)
+            if dropped:
+                changed[field] = collapsed
+                removed += dropped
+    return ({**article, **changed} if changed else article), removed
+
+
+def main():
+    from utils.news_store import NewsStore
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="JSON files holding a list of articles")
+    parser.add_argument("--threshold", type=float, default=NEWS_DEDUP_THRESHOLD)
+    parser.add_argument("--containment", type=float, default=NEWS_DEDUP_PARAGRAPH_CONTAINMENT)
+    parser.add_argument("--window-hours", type=float, default=NEWS_DEDUP_WINDOW_HOURS)
+    args = parser.parse_args()
+
+    # Ingest into a throwaway store so the report is exactly what NewsStore.append would keep
+    with tempfile.TemporaryDirectory() as workdir:
+        store = NewsStore(os.path.join(workdir, "news_store.db"), dedup_threshold=args.threshold,
+                          paragraph_containment=args.containment, dedup_window_hours=args.window_hours)
+        for path in args.paths:
+            with open(path, "r", encoding="utf-8") as f:
+                store.append(json.load(f))
+        stats = store.dedup_stats()
+
+    print(f"Articles: {stats['articles']} -> {stats['stored']} "
+          f"({stats['duplicates']} near-duplicates collapsed)")
+    print(f"Paragraphs dropped: {stats['paragraphs']}")
+    print(f"Text: {stats['chars_in']} -> {stats['chars_out']} characters "
+          f"({100 * (1 - stats['chars_out'] / max(1, stats['chars_in'])):.1f}% smaller)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import os
+import random
+import time
+
+import feedparser
+import httpx
+
+DEFAULT_FEEDS = "https://economictimes.indiatimes.com/markets/rssfeeds/1977021501.cms"
+
+# Comma-separated RSS/Atom feed URLs
+NEWS_FEEDS = [url.strip() for url in os.getenv("NEWS_FEEDS", DEFAULT_FEEDS).split(",") if url.strip()]
+NEWS_REFRESH_INTERVAL_SEC = float(os.getenv("NEWS_REFRESH_INTERVAL_SEC", "900"))
+NEWS_REFRESH_JITTER = float(os.getenv("NEWS_REFRESH_JITTER", "0.1"))  # +/- fraction of the interval
+# After consecutive failures a feed sits out 0, 1, 3, 7, ... refresh rounds, at most this many
+NEWS_FEED_MAX_SKIP_ROUNDS = int(os.getenv("NEWS_FEED_MAX_SKIP_ROUNDS", "8"))
+NEWS_FEED_TIMEOUT_SEC = float(os.getenv("NEWS_FEED_TIMEOUT_SEC", "15"))
+NEWS_FEED_MAX_CONNECTIONS = int(os.getenv("NEWS_FEED_MAX_CONNECTIONS", "10"))
+
+
+def parse_feed(body, source):
+    """
+    Turn a feed document into article dictionaries.
+
+    Args:
+        body (bytes): Raw RSS/Atom document
+        source (str): Feed URL, recorded on every article
+
+    Returns:
+        list: Articles with title, link, summary, guid, published and source
+    """
+    feed = feedparser.parse(body)
+    articles = []
+    for entry in feed.entries:
+        articles.append({
+            "title": entry.get("title", ""),
+            "link": entry.get("link", ""),
+            "summary": entry.get("summary", ""),
+            "guid": entry.get("id", ""),
+            "published": entry.get("published", ""),
+            "source": source,
+        })
+    return articles
+
+
+def article_id(article):
+    """Identity used to de-duplicate an article across feeds: GUID, then link, then title."""
+    return article.get("guid") or article.get("link") or article.get("title", "")
+
+
+class FeedIngestor:
+    """
+    Fetches a set of feeds concurrently and merges their articles.
+
+    Each feed remembers the ETag / Last-Modified validators and the articles
+    of its last successful fetch, so an unchanged feed costs one conditional
+    request answered with 304. A failing feed keeps its previous articles
+    and sits out an exponentially growing number of rounds. Only the validators
+    are saved next to the news store, so they survive restarts; articles
+    already published are in the store.
+    """
+
+    def __init__(self, feeds=None, state_path=None, timeout=NEWS_FEED_TIMEOUT_SEC,
+                 max_connections=NEWS_FEED_MAX_CONNECTIONS):
+        """
+        Args:
+            feeds (list): Feed URLs, in priority order for de-duplication
+            state_path (str): JSON file for the validators; None keeps them in memory only
+            timeout (float): Per-request timeout in seconds
+            max_connections (int): Connection pool size shared by all feeds
+        """
+        self.feeds = list(feeds if feeds is not None else NEWS_FEEDS)
+        self.state_path = state_path
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+        self._state = self._load_state()
+
+    def _load_state(self):
+        state = {}
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except Exception as e:
+                print(f"Ignoring unreadable feed state {self.state_path}: {e}")
+        # Articles are not restored (older state files still have them); the news store holds them
+        return {
+            url: {"etag": state.get(url, {}).get("etag"), "last_modified": state.get(url, {}).get("last_modified"),
+                  "articles": [], "failures": 0, "skip_rounds": 0}
+            for url in self.feeds
+        }
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        validators = {url: {"etag": state["etag"], "last_modified": state["last_modified"]}
+                      for url, state in self._state.items()}
+        # Per-process name, so workers saving at the same moment don't write into one temp file
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(validators, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _fetch(self, url):
+        """Fetch one feed, returning "fetched", "not_modified", "skipped" or "failed"."""
+        state = self._state[url]
+        if state["skip_rounds"] > 0:
+            state["skip_rounds"] -= 1
+            return "skipped"
+        headers = {}
+        if state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
+        try:
+            response = await self._get_client().get(url, headers=headers)
+            if response.status_code == 304:
+                status = "not_modified"
+            else:
+                response.raise_for_status()
+                state["articles"] = await asyncio.to_thread(parse_feed, response.content, url)
+                state["etag"] = response.headers.get("ETag")
+                state["last_modified"] = response.headers.get("Last-Modified")
+                status = "fetched"
+        except Exception as e:
+            state["failures"] += 1
+            state["skip_rounds"] = min(NEWS_FEED_MAX_SKIP_ROUNDS, 2 ** (state["failures"] - 1) - 1)
+            print(
+                f"Error fetching feed {url} (attempt {state['failures']}, "
+                f"skipping {state['skip_rounds']} rounds): {e}"
+            )
+            return "failed"
+        state["failures"] = 0
+        return status
+
+    def articles(self):
+        """Articles of all feeds, de-duplicated by GUID/link, in feed order."""
+        seen = set()
+        merged = []
+        for url in self.feeds:
+            for article in self._state[url]["articles"]:
+                key = article_id(article)
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(article)
+        return merged
+
+    async def refresh(self):
+        """
+        Fetch every feed concurrently.
+
+        Returns:
+            tuple: (merged article list, dict of feed URL -> fetch status)
+        """
+        statuses = await asyncio.gather(*(self._fetch(url) for url in self.feeds))
+        return self.articles(), dict(zip(self.feeds, statuses))
+
+    async def save_state(self):
+        """Persist the validators; a failure is logged rather than raised. Returns True if saved."""
+        try:
+            await asyncio.to_thread(self._save_state)
+            return True
+        except Exception as e:
+            print(f"[news_feeds] Could not save feed state {self.state_path}: {e}")
+            return False
+
+    async def run_forever(self, on_articles, interval=NEWS_REFRESH_INTERVAL_SEC, jitter=NEWS_REFRESH_JITTER):
+        """
+        Refresh on a schedule, calling on_articles(articles) on the first
+        round, whenever a feed changed, and again after a round whose
+        on_articles call failed.
+
+        Sleeps interval +/- jitter between rounds so several workers don't
+        hit the feeds in lockstep. Runs until cancelled.
+
+        Args:
+            on_articles (callable): Coroutine function given the merged article list
+            interval (float): Seconds between refreshes
+            jitter (float): Random spread as a fraction of the interval
+        """
+        # The feeds' articles stay in memory, so a failed publish is retried next round even if it's a 304
+        unpublished = True
+        unsaved = False
+        while True:
+            try:
+                start = time.perf_counter()
+                articles, statuses = await self.refresh()
+                counts = {status: list(statuses.values()).count(status) for status in set(statuses.values())}
+                print(
+                    f"[news_feeds] Refreshed {len(self.feeds)} feeds in {time.perf_counter() - start:.2f}s: "
+                    f"{counts}, {len(articles)} unique articles"
+                )
+                if "fetched" in statuses.values():
+                    unpublished = unsaved = True
+                if unpublished:
+                    await on_articles(articles)
+                    unpublished = False
+                # Saved only once the articles are published, so a restart after a failed
+                # publish fetches them again instead of getting a 304
+                if unsaved:
+                    unsaved = not await self.save_state()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[news_feeds] Refresh failed: {e}")
+            await asyncio.sleep(max(1.0, interval * (1 + random.uniform(-jitter, jitter))))
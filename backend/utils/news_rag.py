@@ -1,41 +1,315 @@
-import json
-import faiss
-from sentence_transformers import SentenceTransformer
 import numpy as np
 import os
+import threading
+import time
+from utils.embedding_cache import EmbeddingCache, content_key
+from utils.index_persistence import load_index, manifest_path_for, save_index
+from utils.ann_index import (
+    NEWS_INDEX_TYPE, build_index, configure_search, is_lossless, needs_training, reconstruct_rows, update_index,
+)
+from utils.entity_index import EntityIndex, load_aliases, reciprocal_rank_fusion
+from utils.news_store import NewsStore
+from utils.metrics import span
+from utils.encoders import NEWS_ENCODER, load_encoder
+
+EMBED_MODEL_NAME = os.getenv("NEWS_EMBED_MODEL", "all-MiniLM-L6-v2")
+EMBED_BATCH_SIZE = int(os.getenv("NEWS_EMBED_BATCH_SIZE", "64"))
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("NEWS_EMBED_CACHE_MAX", "200000"))
+# Company searches rank this many times top_k candidates from each source before fusing
+FUSION_DEPTH_FACTOR = int(os.getenv("NEWS_FUSION_DEPTH_FACTOR", "3"))
+
+class IndexSnapshot:
+    """
+    One immutable generation of the searchable news index.
+
+    Searches read a snapshot once and use it throughout, so an update can
+    swap in a new generation without locking out readers. news_data holds
+    the id/title/summary headline of each row; full articles are fetched
+    from the news store by id only for the rows a search returns.
+    trained_rows and drift track when the index is due for retraining.
+    """
+
+    def __init__(self, generation, index, news_data, keys, entities, trained_rows=0, drift=0):
+        self.generation = generation
+        self.index = index
+        self.news_data = news_data
+        self.keys = keys
+        self.entities = entities
+        # Rows the index was trained on, and rows added or expired since then
+        self.trained_rows = trained_rows
+        self.drift = drift
+
 
 class NewsRAGEngine:
-    def __init__(self, news_file_path):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        # Make path absolute relative to this file
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        abs_path = os.path.join(base_dir, '..', news_file_path)
-        print("Loading news data from:", abs_path)
-        self.news_data = self.load_news_data(abs_path)
-        self.index, self.news_vectors = self.build_faiss_index()
-
-    def load_news_data(self, path):
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
-    def build_faiss_index(self):
-        embeddings = []
-        for news in self.news_data:
-            # Combine title and summary for better semantic search
-            text_content = f"{news.get('title', '')} {news.get('summary', '')}".strip()
-            if text_content:  # Only process if there's content
-                embedding = self.model.encode(text_content)
-                embeddings.append(embedding)
+    def __init__(self, news_store, batch_size=EMBED_BATCH_SIZE, cache_path=None):
+        """
+        Args:
+            news_store (NewsStore): Where articles are read from
+            batch_size (int): Encoder batch size
+            cache_path (str): Embedding cache file; defaults to one next to the store
+        """
+        self.encoder = load_encoder(EMBED_MODEL_NAME, NEWS_ENCODER)
+        # Includes the encoder backend, so cached vectors and persisted indexes are per backend
+        self.model_name = self.encoder.name
+        self.batch_size = batch_size
+        self.news_store = news_store
+        if cache_path is None:
+            cache_path = os.path.join(os.path.dirname(news_store.path), "embedding_cache.npz")
+        self.embedding_cache = EmbeddingCache(cache_path, max_entries=EMBED_CACHE_MAX_ENTRIES)
+        # Serializes writers only; searches never take this lock
+        self._update_lock = threading.Lock()
+        self.manifest_path = manifest_path_for(news_store.path)
+        self.entity_aliases = load_aliases()
+        print("Loading news data from:", news_store.path)
+        self._store_version = news_store.version()
+        news_data = news_store.headlines()
+        self._snapshot = self._open_snapshot(news_data)
+        # Reconcile a persisted index with articles that changed since it was written
+        self.update_news(news_data)
+
+    @property
+    def generation(self):
+        return self._snapshot.generation
+
+    @property
+    def news_data(self):
+        return self._snapshot.news_data
+
+    @property
+    def index(self):
+        return self._snapshot.index
+
+    def article_keys(self, articles):
+        return [
+            content_key(news.get('title', ''), news.get('summary', ''), self.model_name)
+            for news in articles
+        ]
+
+    def embed_articles(self, articles):
+        """
+        Embed articles in batches, reusing cached vectors for unchanged content.
+
+        Args:
+            articles (list): News article dictionaries with title/summary
+
+        Returns:
+            np.ndarray: float32 matrix with one row per article
+        """
+        start = time.perf_counter()
+        keys = self.article_keys(articles)
+        pending = {}
+        for key, news in zip(keys, articles):
+            if key not in self.embedding_cache and key not in pending:
+                # Combine title and summary for better semantic search
+                pending[key] = f"{news.get('title', '')} {news.get('summary', '')}".strip()
+
+        if pending:
+            with span("article_embed"):
+                encoded = self.encoder.encode(list(pending.values()), batch_size=self.batch_size)
+            for key, vector in zip(pending.keys(), encoded):
+                self.embedding_cache.put(key, vector)
+
+        # Fill the matrix before saving: the save trims the cache to its size limit,
+        # which can evict this build's own vectors when the corpus is larger than that
+        dim = self.encoder.dimension
+        embeddings = np.zeros((len(keys), dim), dtype='float32')
+        for row, key in enumerate(keys):
+            embeddings[row] = self.embedding_cache.get(key)
+
+        # The index holds the vectors from here on; don't keep a second copy around
+        self.embedding_cache.unload()
+
+        elapsed = time.perf_counter() - start
+        cached = len(keys) - sum(1 for key in keys if key in pending)
+        rate = len(keys) / elapsed if elapsed > 0 else float('inf')
+        print(
+            f"[news_rag] {'warm' if cached else 'cold'} embedding build: {len(keys)} articles "
+            f"in {elapsed:.2f}s ({rate:.1f} articles/sec, {cached} cached, {len(pending)} encoded, "
+            f"batch_size={self.batch_size})"
+        )
+        return embeddings
+
+    def embed_new_articles(self, articles):
+        """
+        Encode articles that aren't in the index yet.
+
+        The embedding cache isn't consulted, since new content is almost
+        never in it; the vectors are appended to it as a segment, so the
+        whole cache file is neither read nor rewritten.
+
+        Args:
+            articles (list): News article dictionaries with title/summary
+
+        Returns:
+            np.ndarray: float32 matrix with one row per article
+        """
+        if not articles:
+            return np.zeros((0, self.encoder.dimension), dtype='float32')
+        texts = [f"{news.get('title', '')} {news.get('summary', '')}".strip() for news in articles]
+        with span("article_embed"):
+            vectors = np.asarray(self.encoder.encode(texts, batch_size=self.batch_size), dtype='float32')
+        self.embedding_cache.append(self.article_keys(articles), vectors)
+        return vectors
+
+    def build_entity_index(self, articles):
+        start = time.perf_counter()
+        with span("entity_index_build"):
+            entities = EntityIndex(articles, self.entity_aliases)
+        print(
+            f"[news_rag] Entity index: {len(entities)} terms over {len(articles)} articles "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return entities
+
+    def build_faiss_index(self, articles=None):
+        if articles is None:
+            articles = self.news_data
+        embeddings = self.embed_articles(articles)
+        with span("index_build"):
+            return build_index(embeddings)
+
+    def _open_snapshot(self, articles):
+        """
+        Map the persisted index if there is one, otherwise build and persist it.
+
+        Rows of a persisted index are matched back to articles through the
+        offset table; rows whose article has left the file are kept as None
+        until update_news() expires them.
+        """
+        keys = self.article_keys(articles)
+        persisted = load_index(self.manifest_path, self.model_name, NEWS_INDEX_TYPE)
+        if persisted is None:
+            snapshot = IndexSnapshot(1, self.build_faiss_index(articles), articles, keys,
+                                     self.build_entity_index(articles), trained_rows=len(articles))
+            self._persist_snapshot(snapshot, keys)
+            return snapshot
+
+        index, rows, generation, training, mapped = persisted
+        configure_search(index)
+        position_by_key = {}
+        for position, key in enumerate(keys):
+            position_by_key.setdefault(key, position)
+        news_data = []
+        for row in rows:
+            offset = row["offset"]
+            if not (0 <= offset < len(keys) and keys[offset] == row["key"]):
+                offset = position_by_key.get(row["key"])
+            news_data.append(articles[offset] if offset is not None else None)
+        print(
+            f"[news_rag] Opened persisted {NEWS_INDEX_TYPE} index generation {generation} "
+            f"({index.ntotal} vectors, {'memory-mapped' if mapped else 'read into memory'})"
+        )
+        return IndexSnapshot(generation, index, news_data, [row["key"] for row in rows],
+                             self.build_entity_index(news_data),
+                             trained_rows=training.get("rows", index.ntotal), drift=training.get("drift", 0))
+
+    def _persist_snapshot(self, snapshot, article_keys):
+        position_by_key = {}
+        for position, key in enumerate(article_keys):
+            position_by_key.setdefault(key, position)
+        offsets = [position_by_key[key] for key in snapshot.keys]
+        try:
+            save_index(self.manifest_path, snapshot.index, snapshot.keys, offsets, snapshot.generation,
+                       self.model_name, NEWS_INDEX_TYPE,
+                       training={"rows": snapshot.trained_rows, "drift": snapshot.drift})
+        except Exception as e:
+            print(f"Error persisting news index: {e}")
+
+    def update_news(self, articles):
+        """
+        Incrementally move the index to a new article list and swap it in.
+
+        Articles already indexed keep their vectors, only new ones are
+        embedded, and articles missing from the new list are dropped as
+        expired. The trained structure of the index is reused; it is only
+        retrained once enough rows have changed since the last training
+        (see needs_training). The new generation is published with a single
+        reference assignment, so in-flight searches finish on the old snapshot.
+
+        Args:
+            articles (list): The complete, current list of headlines from NewsStore.headlines()
+
+        Returns:
+            int: The generation number now being served
+        """
+        with self._update_lock:
+            current = self._snapshot
+            new_keys = self.article_keys(articles)
+            new_key_set = set(new_keys)
+            old_key_set = set(current.keys)
+
+            expired_rows = [row for row, key in enumerate(current.keys) if key not in new_key_set]
+            added = [(key, news) for key, news in zip(new_keys, articles) if key not in old_key_set]
+            if not expired_rows and not added:
+                return current.generation
+
+            latest_by_key = dict(zip(new_keys, articles))
+            expired = set(expired_rows)
+            kept_rows = [row for row in range(len(current.keys)) if row not in expired]
+            news_data = [latest_by_key[current.keys[row]] for row in kept_rows]
+            keys = [current.keys[row] for row in kept_rows]
+
+            added_vectors = self.embed_new_articles([news for _, news in added])
+            news_data.extend(news for _, news in added)
+            keys.extend(key for key, _ in added)
+
+            # Readers of the current (possibly mmapped) index are unaffected; updates work on a copy
+            drift = current.drift + len(added) + len(expired_rows)
+            trained_rows = current.trained_rows
+            if needs_training(current.index, trained_rows, drift, len(keys)):
+                # Quantized indexes are retrained on the original vectors, not their approximations
+                if is_lossless(current.index):
+                    vectors = np.vstack([reconstruct_rows(current.index, kept_rows), added_vectors])
+                else:
+                    vectors = self.embed_articles(news_data)
+                with span("index_build"):
+                    index = build_index(vectors)
+                trained_rows, drift = len(keys), 0
             else:
-                # If no content, use a zero vector (will be filtered out)
-                embedding = self.model.encode("")
-                embeddings.append(embedding)
-        
-        embeddings = np.array(embeddings).astype('float32')
-        dim = len(embeddings[0])
-        index = faiss.IndexFlatL2(dim)
-        index.add(embeddings)
-        return index, embeddings
+                with span("index_update"):
+                    index = update_index(current.index, kept_rows, added_vectors)
+
+            with span("entity_index_update"):
+                entities = current.entities.updated(news_data, kept_rows)
+
+            snapshot = IndexSnapshot(current.generation + 1, index, news_data, keys, entities,
+                                     trained_rows=trained_rows, drift=drift)
+            self._snapshot = snapshot
+            self._persist_snapshot(snapshot, new_keys)
+            print(
+                f"[news_rag] Index generation {current.generation + 1}: "
+                f"+{len(added)} new, -{len(expired_rows)} expired, {len(keys)} total"
+                f"{' (retrained)' if not drift else ''}"
+            )
+            return current.generation + 1
+
+    def refresh_from_store(self):
+        """Apply whatever the news store gained or expired since the last refresh."""
+        version = self.news_store.version()
+        if version == self._store_version:
+            return self._snapshot.generation
+        self._store_version = version
+        return self.update_news(self.news_store.headlines())
+
+    def materialize(self, snapshot, rows_per_query):
+        """
+        Fetch the full articles behind index rows with one store lookup.
+
+        Args:
+            snapshot (IndexSnapshot): Snapshot the rows came from
+            rows_per_query (list): Lists of row numbers
+
+        Returns:
+            list: Lists of article dictionaries; articles expired from the store are left out
+        """
+        ids = [snapshot.news_data[row]["id"] for rows in rows_per_query for row in rows]
+        with span("materialize"):
+            articles = iter(self.news_store.get_many(ids))
+        results = []
+        for rows in rows_per_query:
+            fetched = [next(articles) for _ in rows]
+            results.append([article for article in fetched if article is not None])
+        return results
 
     def search_relevant_news(self, query, top_k=5, threshold=2.0):
         """
@@ -49,32 +323,113 @@ class NewsRAGEngine:
         Returns:
             list: List of complete news article dictionaries
         """
-        query_vector = self.model.encode(query)
-        query_vector = np.array([query_vector]).astype('float32')
-        
-        # Search the FAISS index
-        D, I = self.index.search(query_vector, top_k)
-        
-        results = []
-        for idx, distance in zip(I[0], D[0]):
-            if distance < threshold:  # Lower distance = more relevant
-                # Return the complete dictionary of the news article
-                results.append(self.news_data[idx])
-        
+        results, _ = self.search_with_generation(query, top_k=top_k, threshold=threshold)
         return results
-    
+
+    def search_with_generation(self, query, top_k=5, threshold=2.0):
+        """
+        Same as search_relevant_news, but also report which index generation answered.
+
+        Returns:
+            tuple: (list of news article dictionaries, generation number)
+        """
+        results, generation = self.search_batch([query], top_k=top_k, threshold=threshold)
+        return results[0], generation
+
+    def search_batch(self, queries, top_k=5, threshold=2.0, return_vectors=False):
+        """
+        Search for several queries with one encode call and one FAISS search.
+
+        Args:
+            queries (list): The search queries
+            top_k (int or list): Results per query, either shared or one per query
+            threshold (float or list): Distance threshold, either shared or one per query
+            return_vectors (bool): Also return the query embeddings
+
+        Returns:
+            tuple: (list of result lists in query order, generation number),
+                plus the float32 query matrix when return_vectors is set
+        """
+        snapshot = self._snapshot
+        top_ks = top_k if isinstance(top_k, (list, tuple)) else [top_k] * len(queries)
+        thresholds = threshold if isinstance(threshold, (list, tuple)) else [threshold] * len(queries)
+        if not queries:
+            return ([], snapshot.generation, None) if return_vectors else ([], snapshot.generation)
+
+        with span("query_embed"):
+            query_vectors = self.encoder.encode(queries, batch_size=self.batch_size)
+
+        # Search the FAISS index once for the largest k and trim per query
+        with span("faiss_search"):
+            D, I = snapshot.index.search(query_vectors, max(top_ks))
+
+        rows_per_query = []
+        for row, (k, limit) in enumerate(zip(top_ks, thresholds)):
+            rows = []
+            for idx, distance in zip(I[row][:k], D[row][:k]):
+                # Lower distance = more relevant
+                if idx >= 0 and distance < limit and snapshot.news_data[idx] is not None:
+                    rows.append(int(idx))
+            rows_per_query.append(rows)
+        # Return the complete dictionaries of the news articles
+        batch_results = self.materialize(snapshot, rows_per_query)
+
+        if return_vectors:
+            return batch_results, snapshot.generation, query_vectors
+        return batch_results, snapshot.generation
+
     def search_by_company(self, company_name, top_k=5):
         """
         Search for news articles related to a specific company.
         
         Args:
-            company_name (str): Name of the company to search for
+            company_name (str): Name, ticker or alias of the company to search for
             top_k (int): Number of top results to return
         
         Returns:
             list: List of complete news article dictionaries
         """
-        return self.search_relevant_news(company_name, top_k=top_k)
+        results, _ = self.search_by_companies([company_name], top_k=top_k)
+        return results[company_name]
+
+    def search_by_companies(self, company_names, top_k=5, threshold=2.0):
+        """
+        News for several companies from one encode call and one FAISS search.
+
+        Exact mentions found through the entity index are fused with the
+        semantic results by reciprocal rank fusion, so articles that name the
+        company and are also semantically close rank first.
+
+        Args:
+            company_names (list): Company names, tickers or aliases
+            top_k (int): Results per company
+            threshold (float): Distance threshold for the semantic results
+
+        Returns:
+            tuple: (dict of company name -> list of news article dictionaries, generation number)
+        """
+        snapshot = self._snapshot
+        names = list(dict.fromkeys(company_names))
+        if not names:
+            return {}, snapshot.generation
+
+        # Look deeper than top_k on both sides so the fusion has something to rank
+        depth = top_k * FUSION_DEPTH_FACTOR
+        with span("query_embed"):
+            query_vectors = self.encoder.encode(names, batch_size=self.batch_size)
+        with span("faiss_search"):
+            D, I = snapshot.index.search(query_vectors, depth)
+
+        fused_rows = []
+        for row, name in enumerate(names):
+            with span("entity_lookup"):
+                exact = snapshot.entities.lookup(name, limit=depth)
+            semantic = [
+                int(idx) for idx, distance in zip(I[row], D[row])
+                if idx >= 0 and distance < threshold and snapshot.news_data[idx] is not None
+            ]
+            fused_rows.append(reciprocal_rank_fusion([exact, semantic])[:top_k])
+        return dict(zip(names, self.materialize(snapshot, fused_rows))), snapshot.generation
     
     def search_by_topic(self, topic, top_k=5):
         """
@@ -91,7 +446,11 @@ class NewsRAGEngine:
 
 if __name__ == "__main__":
     # Test the improved NewsRAGEngine
-    news_engine = NewsRAGEngine('data/news_articles.json')
+    # Run from backend/ as: python -m utils.news_rag
+    news_engine = NewsRAGEngine(NewsStore())
+
+    # A second build hits the embedding cache and shows the warm rate
+    news_engine.build_faiss_index()
     
     # Test queries
     test_queries = [
@@ -0,0 +1,320 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+import numpy as np
+
+from utils.news_dedup import (
+    NEWS_DEDUP_PARAGRAPH_CONTAINMENT, NEWS_DEDUP_THRESHOLD, NEWS_DEDUP_WINDOW_HOURS, article_text, band_keys, collapse_article_paragraphs,
+    signatures, similarity,
+)
+from utils.news_feeds import article_id
+
+NEWS_STORE_PATH = os.getenv(
+    "NEWS_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "news_store.db"),
+)
+# Articles older than this (by their date) are dropped on retention; 0 keeps everything
+NEWS_RETENTION_DAYS = float(os.getenv("NEWS_RETENTION_DAYS", "90"))
+# Reclaim space once this fraction of the database file is free pages
+NEWS_COMPACT_FREE_RATIO = float(os.getenv("NEWS_COMPACT_FREE_RATIO", "0.25"))
+# Ids per IN (...) query when materializing articles
+FETCH_CHUNK = 500
+
+
+def article_date(article, default=None):
+    """
+    ISO-8601 UTC timestamp for an article from its date or published field.
+
+    Accepts ISO dates and RFC 822 feed dates; anything else gets default
+    (the current time if not given).
+    """
+    for field in ("date", "published"):
+        value = article.get(field)
+        if not value:
+            continue
+        parsed = None
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                parsed = parsedate_to_datetime(str(value))
+            except (TypeError, ValueError):
+                pass
+        if parsed is not None:
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    if default is not None:
+        return default
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class NewsStore:
+    """
+    Append-only article store in a SQLite database in WAL mode.
+
+    Articles are keyed by GUID/link and only ever inserted, each batch in
+    one transaction, so readers see either all of a refresh or none of it.
+    The search index loads just id/title/summary for every article and
+    materializes full articles by id when returning results. Old articles
+    are dropped by date with expire(), which also compacts the file once
+    enough of it is free.
+
+    Near-duplicates are collapsed on the way in: each article's MinHash
+    signature is stored with it and its LSH band keys in article_bands, so
+    a re-published variant of a stored story dated close to it is dropped in
+    favour of the copy stored first.
+    """
+
+    def __init__(self, path=NEWS_STORE_PATH, dedup_threshold=NEWS_DEDUP_THRESHOLD,
+                 paragraph_containment=NEWS_DEDUP_PARAGRAPH_CONTAINMENT, dedup_window_hours=NEWS_DEDUP_WINDOW_HOURS):
+        """
+        Args:
+            path (str): SQLite database file
+            dedup_threshold (float): Estimated Jaccard similarity at which an article is a near-duplicate; 0 disables
+            paragraph_containment (float): See news_dedup.collapse_paragraphs; 0 disables
+            dedup_window_hours (float): Only articles dated this close are compared; 0 compares against all stored
+        """
+        self.path = os.path.abspath(path)
+        self.dedup_threshold = dedup_threshold
+        self.dedup_window_hours = dedup_window_hours
+        self.paragraph_containment = paragraph_containment
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._dedup_stats = {"articles": 0, "stored": 0, "duplicates": 0, "paragraphs": 0,
+                             "chars_in": 0, "chars_out": 0}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " id TEXT NOT NULL UNIQUE,"
+                " date TEXT NOT NULL,"
+                " title TEXT NOT NULL,"
+                " summary TEXT NOT NULL,"
+                " payload BLOB NOT NULL,"
+                " signature BLOB)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS articles_date ON articles (date)")
+            if "signature" not in {row[1] for row in conn.execute("PRAGMA table_info(articles)")}:
+                conn.execute("ALTER TABLE articles ADD COLUMN signature BLOB")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS article_bands ("
+                " key INTEGER NOT NULL,"
+                " seq INTEGER NOT NULL,"
+                " PRIMARY KEY (key, seq)) WITHOUT ROWID"
+            )
+            self._backfill_signatures(conn)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def version(self):
+        """Changes whenever articles are added or expired; cheap to poll."""
+        conn = self._connect()
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM articles").fetchone()[0]
+        return seq, self.__len__()
+
+    def _backfill_signatures(self, conn):
+        # Articles stored before near-duplicate detection existed; one-off, like import_json
+        rows = conn.execute("SELECT seq, payload FROM articles WHERE signature IS NULL").fetchall()
+        if not rows:
+            return
+        sigs = signatures([article_text(json.loads(zlib.decompress(payload))) for _, payload in rows])
+        conn.executemany("UPDATE articles SET signature = ? WHERE seq = ?",
+                         [(self._signature_blob(sig), seq) for (seq, _), sig in zip(rows, sigs)])
+        conn.executemany("INSERT OR IGNORE INTO article_bands (key, seq) VALUES (?, ?)",
+                         [(key, seq) for (seq, _), sig in zip(rows, sigs) if sig is not None for key in band_keys(sig)])
+        print(f"[news_store] Computed near-duplicate signatures for {len(rows)} stored articles")
+
+    @staticmethod
+    def _signature_blob(sig):
+        # An empty blob marks an article without words, so it isn't backfilled again
+        return b"" if sig is None else sig.tobytes()
+
+    def _stored_ids(self, conn, ids):
+        found = set()
+        unique = list(dict.fromkeys(ids))
+        for start in range(0, len(unique), FETCH_CHUNK):
+            chunk = unique[start:start + FETCH_CHUNK]
+            found.update(row[0] for row in conn.execute(
+                f"SELECT id FROM articles WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        return found
+
+    def _near_duplicate(self, conn, sig, keys, date):
+        query = ("SELECT id, signature FROM articles WHERE seq IN"
+                 f" (SELECT seq FROM article_bands WHERE key IN ({','.join('?' * len(keys))}))")
+        params = list(keys)
+        if self.dedup_window_hours > 0:
+            # Stored dates are ISO-8601 UTC strings, so they compare in time order
+            window = timedelta(hours=self.dedup_window_hours)
+            center = datetime.fromisoformat(date)
+            query += " AND date BETWEEN ? AND ?"
+            params += [(center - window).strftime("%Y-%m-%dT%H:%M:%S"), (center + window).strftime("%Y-%m-%dT%H:%M:%S")]
+        rows = conn.execute(query, params)
+        for id_, stored in rows:
+            if stored and similarity(np.frombuffer(stored, dtype=np.uint32), sig) >= self.dedup_threshold:
+                return id_
+        return None
+
+    def append(self, articles):
+        """
+        Add articles not already stored, in one transaction.
+
+        Paragraphs repeated inside an article are dropped first; an article
+        that is then a near-duplicate of a stored one, or of an earlier one
+        in the same batch, dated within dedup_window_hours of it is not added.
+
+        Args:
+            articles (list): Article dictionaries; a missing date is filled in from published or now
+
+        Returns:
+            int: Number of articles added
+        """
+        now = article_date({})
+        ids = [article_id(article) for article in articles]
+        added = duplicates = paragraphs = chars_in = chars_out = 0
+        conn = self._connect()
+        with conn:
+            # Take the write lock up front so the near-duplicate checks see every committed article
+            conn.execute("BEGIN IMMEDIATE")
+            # Feeds return the same articles every refresh; those are skipped before any hashing
+            stored = self._stored_ids(conn, ids)
+            new = []
+            for article, id_ in zip(articles, ids):
+                if id_ not in stored:
+                    stored.add(id_)
+                    chars_in += len(article_text(article))
+                    article, removed = collapse_article_paragraphs(article, self.paragraph_containment)
+                    new.append((id_, article, removed))
+            sigs = signatures([article_text(article) for _, article, _ in new])
+
+            for (id_, article, removed), sig in zip(new, sigs):
+                article = {**article, "date": article_date(article, default=now)}
+                keys = band_keys(sig) if sig is not None else []
+                if (keys and self.dedup_threshold > 0
+                        and self._near_duplicate(conn, sig, keys, article["date"]) is not None):
+                    duplicates += 1
+                    continue
+
+                seq = conn.execute(
+                    "INSERT INTO articles (id, date, title, summary, payload, signature) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        id_,
+                        article["date"],
+                        article.get("title", "") or "",
+                        article.get("summary", "") or "",
+                        zlib.compress(json.dumps(article, ensure_ascii=False, default=str).encode("utf-8")),
+                        self._signature_blob(sig),
+                    ),
+                ).lastrowid
+                conn.executemany("INSERT OR IGNORE INTO article_bands (key, seq) VALUES (?, ?)",
+                                 [(key, seq) for key in keys])
+                added += 1
+                paragraphs += removed
+                chars_out += len(article_text(article))
+
+        with self._stats_lock:
+            for key, value in (("articles", added + duplicates), ("stored", added), ("duplicates", duplicates),
+                               ("paragraphs", paragraphs), ("chars_in", chars_in), ("chars_out", chars_out)):
+                self._dedup_stats[key] += value
+        if duplicates or paragraphs:
+            print(f"[news_store] Collapsed {duplicates} near-duplicate articles and {paragraphs} repeated "
+                  f"paragraphs: {added + duplicates} new articles stored as {added}, "
+                  f"{chars_in} -> {chars_out} characters of text")
+        return added
+
+    def dedup_stats(self):
+        """
+        How much near-duplicate collapsing has shrunk what this process ingested.
+
+        Returns:
+            dict: New articles seen and stored, near-duplicates and paragraphs dropped,
+                and characters of text before and after
+        """
+        with self._stats_lock:
+            return dict(self._dedup_stats)
+
+    def headlines(self):
+        """
+        id/title/summary of every article, oldest first.
+
+        Returns:
+            list: Dictionaries with id, title and summary
+        """
+        rows = self._connect().execute("SELECT id, title, summary FROM articles ORDER BY seq").fetchall()
+        return [{"id": row[0], "title": row[1], "summary": row[2]} for row in rows]
+
+    def get_many(self, ids):
+        """
+        Materialize full articles by id.
+
+        Returns:
+            list: Article dictionaries in the order of ids, None where an id is gone
+        """
+        found = {}
+        conn = self._connect()
+        unique = list(dict.fromkeys(ids))
+        for start in range(0, len(unique), FETCH_CHUNK):
+            chunk = unique[start:start + FETCH_CHUNK]
+            rows = conn.execute(
+                f"SELECT id, payload FROM articles WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for row in rows:
+                found[row[0]] = json.loads(zlib.decompress(row[1]))
+        return [found.get(id_) for id_ in ids]
+
+    def expire(self, retention_days=NEWS_RETENTION_DAYS):
+        """
+        Delete articles dated before the retention window and compact if worthwhile.
+
+        Returns:
+            int: Number of articles deleted
+        """
+        if retention_days <= 0:
+            return 0
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).strftime("%Y-%m-%dT%H:%M:%S")
+        conn = self._connect()
+        with conn:
+            deleted = conn.execute("DELETE FROM articles WHERE date < ?", (cutoff,)).rowcount
+            if deleted:
+                conn.execute("DELETE FROM article_bands WHERE seq NOT IN (SELECT seq FROM articles)")
+        if deleted:
+            self._compact_if_sparse()
+        return deleted
+
+    def _compact_if_sparse(self):
+        conn = self._connect()
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if pages and free / pages >= NEWS_COMPACT_FREE_RATIO:
+            start = time.perf_counter()
+            conn.execute("VACUUM")
+            print(f"[news_store] Compacted {self.path}: {free}/{pages} pages free, {time.perf_counter() - start:.2f}s")
+
+    def import_json(self, path):
+        """One-off migration from a JSON list file such as the old news_articles.json."""
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            articles = json.load(f)
+        added = self.append(articles)
+        if added:
+            print(f"[news_store] Imported {added} articles from {path}")
+        return added
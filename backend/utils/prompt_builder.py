@@ -0,0 +1,232 @@
+import heapq
+import os
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("CHAT_PROMPT_TOKEN_BUDGET", "2048"))
+# Most recent messages quoted verbatim; older ones are folded into the rolling summary
+PROMPT_RECENT_MESSAGES = int(os.getenv("CHAT_PROMPT_RECENT_MESSAGES", "6"))
+PROMPT_TOP_HOLDINGS = int(os.getenv("CHAT_PROMPT_TOP_HOLDINGS", "10"))
+PROMPT_NEWS_ITEMS = int(os.getenv("CHAT_PROMPT_NEWS_ITEMS", "5"))
+PROMPT_NEWS_CHARS = int(os.getenv("CHAT_PROMPT_NEWS_CHARS", "300"))
+# News cached per holding at upload: how many holdings, and articles for each
+PROMPT_HOLDING_NEWS_ASSETS = int(os.getenv("CHAT_PROMPT_HOLDING_NEWS_ASSETS", "5"))
+PROMPT_HOLDING_NEWS_ITEMS = int(os.getenv("CHAT_PROMPT_HOLDING_NEWS_ITEMS", "2"))
+SUMMARY_MAX_CHARS = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", "1500"))
+MESSAGE_MAX_CHARS = 1200
+SUMMARY_LINE_CHARS = 160
+
+INSTRUCTIONS = (
+    "You are an expert financial analyst. Use the conversation so far, the portfolio analysis, "
+    "and the news context to answer the user's question."
+)
+CLOSING = "Provide a clear, helpful, portfolio-aware answer. If context is insufficient, say what more you need."
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def _clip(text, limit):
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def update_history_summary(session, keep_recent=PROMPT_RECENT_MESSAGES):
+    """
+    Fold messages older than the recent window into session["history_summary"].
+
+    Only messages not summarized yet are processed, so each turn costs
+    O(new messages). The summary is extractive (a clipped line per message)
+    and keeps its newest SUMMARY_MAX_CHARS characters.
+
+    Returns:
+        bool: True if the summary changed and should be saved
+    """
+    history = session.get("history") or []
+    summarized = min(session.get("summarized_messages", 0), len(history))
+    cutoff = len(history) - keep_recent
+    if cutoff <= summarized:
+        return False
+
+    lines = [f"{turn['role'].capitalize()}: {_clip(turn['content'], SUMMARY_LINE_CHARS)}"
+             for turn in history[summarized:cutoff]]
+    summary = "\n".join(filter(None, [session.get("history_summary", "")] + lines))
+    if len(summary) > SUMMARY_MAX_CHARS:
+        summary = summary[-SUMMARY_MAX_CHARS:]
+        summary = summary[summary.find("\n") + 1:] if "\n" in summary else summary
+    session["history_summary"] = summary
+    session["summarized_messages"] = cutoff
+    return True
+
+
+def top_holdings(analysis, limit=PROMPT_TOP_HOLDINGS):
+    """
+    Largest holdings by current value, for the prompt.
+
+    Computed once per upload and kept in the session, so chat turns don't
+    sort every Detailed_Assets row again.
+
+    Returns:
+        dict: {"assets": up to limit Detailed_Assets rows, largest first, "total": number of rows}
+    """
+    assets = (analysis or {}).get("Detailed_Assets") or []
+    return {
+        "assets": heapq.nlargest(limit, assets, key=lambda a: float(a.get("Current_Value") or 0)),
+        "total": len(assets),
+    }
+
+
+def _portfolio_section(analysis, holdings, limit):
+    if not analysis:
+        return "(no portfolio analysis available)"
+    lines = [
+        f"Total invested: {analysis['Total_Invested']:.2f}",
+        f"Total current value: {analysis['Total_Current']:.2f}",
+        f"Total profit/loss: {analysis['Total_Profit_Loss']:.2f}",
+        f"Portfolio ROI (%): {analysis['Portfolio_ROI (%)']}",
+        "Diversification: " + ", ".join(
+            f"{d['Asset_Type']} {d['Percentage']}%" for d in analysis.get("Asset_Diversification", [])
+        ),
+    ]
+    if analysis.get("Portfolio_XIRR (%)") is not None or analysis.get("Portfolio_CAGR (%)") is not None:
+        lines.append(f"Portfolio XIRR (%): {analysis.get('Portfolio_XIRR (%)')}, "
+                     f"CAGR (%): {analysis.get('Portfolio_CAGR (%)')}")
+        lines.append("Annualized return by type (XIRR %): " + ", ".join(
+            f"{t['Asset_Type']} {t['XIRR (%)']}" for t in analysis.get("Type_Returns", [])
+        ))
+    if holdings is None:
+        # Sessions uploaded before top holdings were kept with them
+        holdings = top_holdings(analysis, limit)
+    total = holdings["total"]
+    if total and limit:
+        top = holdings["assets"][:limit]
+        lines.append(f"Top {len(top)} of {total} holdings by current value:")
+        for asset in top:
+            lines.append(
+                f"- {asset.get('Asset')} ({asset.get('Type')}): invested {asset.get('Invested_Amount')}, "
+                f"current {asset.get('Current_Value')}, ROI {asset.get('ROI (%)')}%"
+            )
+        if total > len(top):
+            lines.append(f"- ... {total - len(top)} smaller holdings omitted")
+    return "\n".join(lines)
+
+
+def _news_section(news, items, chars, exclude_titles=()):
+    # Articles already quoted under a holding aren't repeated
+    news = [article for article in news or [] if article.get('title') not in exclude_titles]
+    if not news or not items:
+        return "(no relevant news found)"
+    return "\n".join(
+        f"- {_clip(article.get('title'), 200)}: {_clip(article.get('summary'), chars)}"
+        for article in news[:items]
+    )
+
+
+def _select_holding_news(holding_news, holdings, items):
+    news_by_asset = (holding_news or {}).get("news_by_asset") or {}
+    if not items:
+        return {}
+    # Assets are stored largest holding first
+    assets = [asset for asset, articles in news_by_asset.items() if articles][:holdings]
+    return {asset: news_by_asset[asset][:items] for asset in assets}
+
+
+def _holding_news_section(selected, chars):
+    if not selected:
+        return "(no holding-specific news)"
+    lines = []
+    for asset, articles in selected.items():
+        lines.append(f"{asset}:")
+        lines.extend(
+            f"  - {_clip(article.get('title'), 200)}: {_clip(article.get('summary'), chars)}"
+            for article in articles
+        )
+    return "\n".join(lines)
+
+
+def _render(question, summary, recent, session, news, limits):
+    recent_messages, holdings_limit, news_items, news_chars, summary_chars, holding_assets, holding_items = limits
+    recent = recent[-recent_messages:] if recent_messages else []
+    conversation = []
+    if summary and summary_chars:
+        conversation.append("Summary of earlier conversation:\n" + summary[-summary_chars:])
+    conversation.extend(
+        f"{turn['role'].capitalize()}: {_clip(turn['content'], MESSAGE_MAX_CHARS)}" for turn in recent
+    )
+    holding_news = _select_holding_news(session.get("holding_news"), holding_assets, holding_items)
+    holding_titles = {article.get('title') for articles in holding_news.values() for article in articles}
+    return f"""{INSTRUCTIONS}
+Conversation so far:
+{chr(10).join(conversation) or '(none)'}
+
+Portfolio analysis:
+{_portfolio_section(session.get("analysis"), session.get("top_holdings"), holdings_limit)}
+
+News about your largest holdings:
+{_holding_news_section(holding_news, news_chars)}
+
+News related to the question:
+{_news_section(news, news_items, news_chars, holding_titles)}
+
+User question: {question}
+{CLOSING}"""
+
+
+def build_chat_prompt(session, question, news, budget=PROMPT_TOKEN_BUDGET):
+    """
+    Assemble the chat prompt within a token budget.
+
+    Sections are degraded step by step (shorter news, fewer holdings and
+    holding news, fewer recent messages, shorter summary) until the
+    estimate fits the budget.
+    Updates the session's rolling history summary in place.
+
+    Args:
+        session (dict): Chat session with history, analysis, top_holdings and holding_news
+        question (str): The user's question
+        news (list): Relevant news article dicts
+        budget (int): Approximate token budget for the whole prompt
+
+    Returns:
+        tuple: (prompt string, dict of prompt size stats)
+    """
+    update_history_summary(session)
+    history = session.get("history") or []
+    summarized = session.get("summarized_messages", 0)
+    recent = history[summarized:]
+    summary = session.get("history_summary", "")
+
+    limits = [PROMPT_RECENT_MESSAGES, PROMPT_TOP_HOLDINGS, PROMPT_NEWS_ITEMS, PROMPT_NEWS_CHARS, SUMMARY_MAX_CHARS,
+              PROMPT_HOLDING_NEWS_ASSETS, PROMPT_HOLDING_NEWS_ITEMS]
+    degradations = [
+        (3, PROMPT_NEWS_CHARS // 2),
+        (6, 1),
+        (1, PROMPT_TOP_HOLDINGS // 2),
+        (0, min(PROMPT_RECENT_MESSAGES, 2)),
+        (2, min(PROMPT_NEWS_ITEMS, 3)),
+        (5, min(PROMPT_HOLDING_NEWS_ASSETS, 3)),
+        (4, SUMMARY_MAX_CHARS // 3),
+        (1, 0),
+        (3, 80),
+        (5, 0),
+        (4, 0),
+        (0, 0),
+    ]
+    prompt = _render(question, summary, recent, session, news, limits)
+    steps = 0
+    for position, value in degradations:
+        if estimate_tokens(prompt) <= budget:
+            break
+        limits[position] = min(limits[position], value)
+        prompt = _render(question, summary, recent, session, news, limits)
+        steps += 1
+
+    stats = {
+        "chars": len(prompt),
+        "tokens": estimate_tokens(prompt),
+        "budget": budget,
+        "degradation_steps": steps,
+        "recent_messages": min(len(recent), limits[0]),
+        "summarized_messages": summarized,
+    }
+    return prompt, stats
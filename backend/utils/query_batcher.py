@@ -0,0 +1,137 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+
+import numpy as np
+
+
+class QueryBatcher:
+    """
+    Coalesces concurrent news searches into batched engine calls.
+
+    Queries that arrive within max_wait_ms of the first queued query, up to
+    max_batch_size of them, are encoded and searched together by a single
+    worker thread. Each caller gets a Future resolving to
+    (results, index_generation, query_vector); the vector lets callers
+    reuse the embedding without encoding the query again.
+    """
+
+    def __init__(self, engine_factory, max_batch_size=32, max_wait_ms=2.0, stats_window=10000):
+        """
+        Args:
+            engine_factory (callable): Returns the NewsRAGEngine; called on the worker thread
+            max_batch_size (int): Most queries searched in one engine call
+            max_wait_ms (float): How long the first query in a batch waits for company
+            stats_window (int): Number of recent requests/batches kept for stats
+        """
+        self.engine_factory = engine_factory
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=stats_window)
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._requests = 0
+        self._batches = 0
+        self._stats_lock = threading.Lock()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def submit(self, query, top_k=5, threshold=2.0):
+        """Queue a search and return a Future for (results, generation, query_vector)."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((query, top_k, threshold, future, time.perf_counter()))
+        return future
+
+    def search(self, query, top_k=5, threshold=2.0):
+        """Blocking helper for synchronous callers."""
+        return self.submit(query, top_k=top_k, threshold=threshold).result()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            # Also replaces a worker that died, so queued searches never wait on a dead thread
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="news-query-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Window closed; still take anything already queued
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _resolve(future, result=None, exception=None):
+        # The caller may have been cancelled (shutdown, wait_for timeout) since the check in _run
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def _run(self):
+        while True:
+            # Searches whose callers were cancelled while queued are dropped unsearched
+            batch = [item for item in self._collect_batch() if item[3].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                engine = self.engine_factory()
+                results, generation, vectors = engine.search_batch(
+                    [item[0] for item in batch],
+                    top_k=[item[1] for item in batch],
+                    threshold=[item[2] for item in batch],
+                    return_vectors=True,
+                )
+            except Exception as e:
+                print(f"Error occured in QueryBatcher batch of {len(batch)}: {e}")
+                for item in batch:
+                    self._resolve(item[3], exception=e)
+                continue
+
+            finished = time.perf_counter()
+            for item, item_results, vector in zip(batch, results, vectors):
+                self._resolve(item[3], (item_results, generation, vector))
+            with self._stats_lock:
+                self._requests += len(batch)
+                self._batches += 1
+                self._batch_sizes.append(len(batch))
+                self._latencies.extend((finished - item[4]) * 1000.0 for item in batch)
+
+    def stats(self):
+        """Latency percentiles and batch-size figures over the recent window."""
+        with self._stats_lock:
+            latencies = np.array(self._latencies, dtype='float64')
+            sizes = np.array(self._batch_sizes, dtype='float64')
+            requests, batches = self._requests, self._batches
+        return {
+            "requests": requests,
+            "batches": batches,
+            "queue_depth": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies, 50)), 3) if latencies.size else None,
+                "p99": round(float(np.percentile(latencies, 99)), 3) if latencies.size else None,
+            },
+            "batch_size": {
+                "mean": round(float(sizes.mean()), 2) if sizes.size else None,
+                "p50": float(np.percentile(sizes, 50)) if sizes.size else None,
+                "max": int(sizes.max()) if sizes.size else None,
+            },
+        }
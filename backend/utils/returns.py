@@ -0,0 +1,204 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Valuation date for Current_Value (YYYY-MM-DD); defaults to today
+VALUATION_DATE = os.getenv("PORTFOLIO_VALUATION_DATE")
+DAYS_PER_YEAR = 365.0
+# Holding periods shorter than this report the absolute return as CAGR instead of annualizing it
+MIN_ANNUALIZE_YEARS = float(os.getenv("PORTFOLIO_MIN_ANNUALIZE_YEARS", "1.0"))
+
+XIRR_MAX_ITERATIONS = 100
+XIRR_TOLERANCE = 1e-10
+# Solved for x = log(1 + rate); the bracket covers rates from about -100% to e^20
+XIRR_LOG_BOUNDS = (-20.0, 20.0)
+
+
+def holding_years(dates, as_of=None):
+    """
+    Years from each lot's purchase date to the valuation date.
+
+    Args:
+        dates (pd.Series): Purchase dates (strings, dates or datetimes)
+        as_of (str or datetime): Valuation date; defaults to VALUATION_DATE or today
+
+    Returns:
+        np.ndarray: float64 years per lot, NaN where the date is missing or unparseable
+    """
+    parsed = pd.to_datetime(dates, errors='coerce')
+    if getattr(parsed.dt, 'tz', None) is not None:
+        parsed = parsed.dt.tz_localize(None)
+    valuation = pd.Timestamp(as_of or VALUATION_DATE or pd.Timestamp.today()).normalize()
+    days = (valuation - parsed).dt.days.to_numpy(dtype='float64', na_value=np.nan)
+    # A purchase dated after the valuation date is treated as bought that day
+    return np.maximum(days, 0.0) / DAYS_PER_YEAR
+
+
+def batched_xirr(invested, current, years, groups, n_groups):
+    """
+    Solve the XIRR of many groups of lots at once.
+
+    Each lot is a purchase of invested[i], years[i] before the valuation
+    date, and a group's combined current value is received on the valuation
+    date. For group g the rate r solves
+
+        sum_i invested[i] * (1 + r) ** years[i] = sum_i current[i]
+
+    Its left-hand side increases with r, so the root is unique when it exists.
+    All groups run one safeguarded Newton iteration per round on
+    x = log(1 + r): a step that leaves the current bracket falls back to
+    bisection, and per-group sums are np.bincount calls over all lots.
+
+    Args:
+        invested (np.ndarray): Amount paid per lot (> 0)
+        current (np.ndarray): Current value per lot
+        years (np.ndarray): Holding period per lot in years (>= 0)
+        groups (np.ndarray): Group index per lot, in [0, n_groups)
+        n_groups (int): Number of groups
+
+    Returns:
+        np.ndarray: Rate per group as a fraction, NaN where it is undefined
+            (no lots, nothing invested, or every lot bought on the valuation date)
+    """
+    total_invested = np.bincount(groups, weights=invested, minlength=n_groups)
+    total_current = np.bincount(groups, weights=current, minlength=n_groups)
+    max_years = np.zeros(n_groups)
+    np.maximum.at(max_years, groups, years)
+
+    rates = np.full(n_groups, np.nan)
+    solvable = (total_invested > 0) & (max_years > 0)
+    # Everything lost: the rate is -100% however long it was held
+    wiped_out = solvable & (total_current <= 0)
+    rates[wiped_out] = -1.0
+    active = solvable & ~wiped_out
+    if not active.any():
+        return rates
+
+    lo = np.full(n_groups, XIRR_LOG_BOUNDS[0])
+    hi = np.full(n_groups, XIRR_LOG_BOUNDS[1])
+    # Start from the invested-weighted CAGR, usually within a few steps of the root
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_years = np.bincount(groups, weights=invested * years, minlength=n_groups) / total_invested
+        x = np.log(total_current / total_invested) / mean_years
+    x = np.where(np.isfinite(x), np.clip(x, lo, hi), 0.0)
+
+    scale = np.where(active, total_current, 1.0)
+    for _ in range(XIRR_MAX_ITERATIONS):
+        with np.errstate(over='ignore', invalid='ignore'):
+            growth = invested * np.exp(years * x[groups])
+            value = np.bincount(groups, weights=growth, minlength=n_groups) - total_current
+            slope = np.bincount(groups, weights=growth * years, minlength=n_groups)
+
+        # value increases with x: a positive value means the root is below x
+        above = value > 0
+        hi = np.where(active & above, x, hi)
+        lo = np.where(active & ~above, x, lo)
+        converged = np.abs(value) <= XIRR_TOLERANCE * scale
+        active &= ~converged & (hi - lo > XIRR_TOLERANCE)
+        if not active.any():
+            break
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            newton = x - value / slope
+        inside = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        x = np.where(active, np.where(inside, newton, 0.5 * (lo + hi)), x)
+
+    solved = solvable & ~wiped_out
+    # A root pinned at a bracket edge means there was none inside it
+    at_edge = (x <= XIRR_LOG_BOUNDS[0] + 1e-9) | (x >= XIRR_LOG_BOUNDS[1] - 1e-9)
+    rates[solved & ~at_edge] = np.expm1(x[solved & ~at_edge])
+    return rates
+
+
+def group_cagr(invested, current, years, groups, n_groups):
+    """
+    CAGR per group, annualized over the invested-weighted holding period.
+
+    Returns:
+        tuple: (rate per group as a fraction or NaN, weighted years per group)
+    """
+    total_invested = np.bincount(groups, weights=invested, minlength=n_groups)
+    total_current = np.bincount(groups, weights=current, minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weighted_years = np.bincount(groups, weights=invested * years, minlength=n_groups) / total_invested
+        growth = total_current / total_invested
+        rates = np.where(weighted_years >= MIN_ANNUALIZE_YEARS,
+                         np.power(growth, 1.0 / weighted_years) - 1.0, growth - 1.0)
+    rates[~(total_invested > 0) | ~np.isfinite(weighted_years)] = np.nan
+    return rates, weighted_years
+
+
+def nan_to_none(values):
+    """Replace NaN (a blank cell) with None in a list, since the analysis is returned as JSON."""
+    return [None if isinstance(value, float) and value != value else value for value in values]
+
+
+def _percent(values):
+    """Fractions to rounded percentages, with NaN as None (the session is stored as JSON)."""
+    percent = np.round(values * 100, 2).tolist()
+    for row in np.flatnonzero(np.isnan(values)):
+        percent[row] = None
+    return percent
+
+
+def time_weighted_returns(frame, invested, current, as_of=None):
+    """
+    CAGR and XIRR per lot, asset, asset type and for the whole portfolio.
+
+    Lots without a parseable Date, with nothing invested or with a blank
+    Current_Value are left out of the time-weighted figures (their CAGR is None).
+
+    Args:
+        frame (pd.DataFrame): Portfolio with Asset, Type and Date columns
+        invested (np.ndarray): Invested_Amount per lot
+        current (np.ndarray): Current_Value per lot
+        as_of (str or datetime): Valuation date; defaults to VALUATION_DATE or today
+
+    Returns:
+        dict: lot_cagr (list), portfolio CAGR/XIRR, Asset_Returns and Type_Returns lists
+    """
+    years = holding_years(frame['Date'], as_of)
+    dated = np.isfinite(years) & (invested > 0) & np.isfinite(current)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = current / invested
+        lot_cagr = np.where(years >= MIN_ANNUALIZE_YEARS, np.power(growth, 1.0 / years) - 1.0, growth - 1.0)
+    lot_cagr[~dated] = np.nan
+
+    inv, cur, yrs = invested[dated], current[dated], years[dated]
+    result = {"lot_cagr": _percent(lot_cagr)}
+
+    # The portfolio is solved as one more group alongside the assets and types
+    asset_codes, assets = pd.factorize(frame['Asset'][dated], use_na_sentinel=False)
+    type_codes, types = pd.factorize(frame['Type'][dated], use_na_sentinel=False)
+    n_assets, n_types = len(assets), len(types)
+    groups = np.concatenate([asset_codes, n_assets + type_codes, np.full(len(inv), n_assets + n_types)])
+    n_groups = n_assets + n_types + 1
+    inv3, cur3, yrs3 = np.tile(inv, 3), np.tile(cur, 3), np.tile(yrs, 3)
+
+    xirr = batched_xirr(inv3, cur3, yrs3, groups, n_groups)
+    cagr, weighted_years = group_cagr(inv3, cur3, yrs3, groups, n_groups)
+    totals_invested = np.bincount(groups, weights=inv3, minlength=n_groups)
+    totals_current = np.bincount(groups, weights=cur3, minlength=n_groups)
+
+    xirr_pct, cagr_pct = _percent(xirr), _percent(cagr)
+    years_held = np.round(weighted_years, 2).tolist()
+    for row in np.flatnonzero(np.isnan(weighted_years)):
+        years_held[row] = None
+
+    def rows(key, names, offset):
+        return [{
+            key: name,
+            "Invested": totals_invested[offset + i].item(),
+            "Current": totals_current[offset + i].item(),
+            "Years_Held": years_held[offset + i],
+            "CAGR (%)": cagr_pct[offset + i],
+            "XIRR (%)": xirr_pct[offset + i],
+        } for i, name in enumerate(nan_to_none(names.tolist()))]
+
+    result["Portfolio_CAGR (%)"] = cagr_pct[-1]
+    result["Portfolio_XIRR (%)"] = xirr_pct[-1]
+    result["Asset_Returns"] = rows("Asset", assets, 0)
+    result["Type_Returns"] = rows("Asset_Type", types, n_assets)
+    return result
@@ -0,0 +1,355 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+SESSION_STORE = os.getenv("SESSION_STORE", "memory").lower()
+SESSION_DB_PATH = os.getenv(
+    "SESSION_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "sessions.db"),
+)
+SESSION_TTL_SEC = float(os.getenv("SESSION_TTL_SEC", str(6 * 60 * 60)))
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+# Messages kept per session; older ones are dropped on save
+SESSION_MAX_HISTORY = int(os.getenv("SESSION_MAX_HISTORY", "200"))
+# Expired and surplus SQLite sessions are swept at most this often, not on every save
+SESSION_EVICT_INTERVAL_SEC = float(os.getenv("SESSION_EVICT_INTERVAL_SEC", "60"))
+
+# Large, rarely-changing fields kept compressed and apart from the small session state
+BLOB_FIELDS = ("portfolio", "analysis", "top_holdings", "holding_news")
+
+
+def new_session():
+    return {
+        "history": [],           # list of {role, content}
+        "portfolio": None,       # parsed portfolio data
+        "analysis": None,        # analyze_portfolio result for the current portfolio
+        "top_holdings": None,    # largest Detailed_Assets rows, picked once for the chat prompt
+        "holding_news": None     # news per largest holding, with the index generation it came from
+    }
+
+
+class SessionTooLargeError(ValueError):
+    """Raised when a single session would exceed the store's whole byte budget."""
+
+
+def _json_size(value):
+    return len(json.dumps(value, default=str))
+
+
+def _trim_history(session, max_history):
+    history = session.get("history")
+    if history is not None and len(history) > max_history:
+        dropped = len(history) - max_history
+        session["history"] = history[dropped:]
+        # Keep the prompt builder's summary cursor pointing at the same message
+        if "summarized_messages" in session:
+            session["summarized_messages"] = max(0, session["summarized_messages"] - dropped)
+
+
+class SessionStore:
+    """
+    Interface for chat session storage.
+
+    get() hands back a session dict; changes are only guaranteed to be kept
+    after save() (whole session) or update() (selected top-level fields).
+    """
+
+    def create(self, session_id):
+        session = new_session()
+        self.save(session_id, session)
+        return session
+
+    def get(self, session_id):
+        raise NotImplementedError
+
+    def save(self, session_id, session):
+        raise NotImplementedError
+
+    def update(self, session_id, **fields):
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    def exists(self, session_id):
+        """Whether a live session exists, without loading it or counting as an access."""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def __contains__(self, session_id):
+        return self.exists(session_id)
+
+    def stats(self):
+        return {"backend": type(self).__name__, "sessions": len(self)}
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local sessions with LRU + idle-TTL eviction and a byte budget.
+
+    Sizes are JSON-length estimates. Large fields are only re-measured when
+    a different object is stored under them, so per-turn saves stay cheap.
+    """
+
+    def __init__(self, max_sessions=SESSION_MAX_COUNT, ttl_seconds=SESSION_TTL_SEC,
+                 max_bytes=SESSION_MAX_BYTES, max_history=SESSION_MAX_HISTORY):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_history = max_history
+        # session_id -> [session, last_access, size_bytes, {field: (id, size)}]
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._evictions = 0
+        # Reentrant so update() can read, merge and save() in one critical section
+        self._lock = threading.RLock()
+
+    def _measure(self, entry):
+        session, field_sizes = entry[0], entry[3]
+        size = 0
+        for field, value in session.items():
+            if field == "history":
+                size += _json_size(value)
+                continue
+            cached = field_sizes.get(field)
+            if cached is None or cached[0] != id(value):
+                cached = (id(value), _json_size(value))
+                field_sizes[field] = cached
+            size += cached[1]
+        return size
+
+    def _evict(self, now):
+        # Entries are ordered by last access, so expired ones sit at the front
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            over_budget = len(self._entries) > self.max_sessions or self._total_bytes > self.max_bytes
+            if not over_budget and now - entry[1] <= self.ttl_seconds:
+                break
+            self._entries.popitem(last=False)
+            self._total_bytes -= entry[2]
+            self._evictions += 1
+
+    def get(self, session_id):
+        with self._lock:
+            now = time.time()
+            self._evict(now)
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            entry[1] = now
+            self._entries.move_to_end(session_id)
+            return entry[0]
+
+    def save(self, session_id, session):
+        with self._lock:
+            _trim_history(session, self.max_history)
+            entry = self._entries.get(session_id)
+            candidate = [session, time.time(), 0, dict(entry[3]) if entry is not None else {}]
+            candidate[2] = self._measure(candidate)
+            # Storing it would only evict it again, so refuse it and keep what was there
+            if candidate[2] > self.max_bytes:
+                raise SessionTooLargeError(
+                    f"Session needs about {candidate[2]} bytes; the limit is {self.max_bytes}."
+                )
+            if entry is not None:
+                self._total_bytes -= entry[2]
+            self._entries[session_id] = candidate
+            self._total_bytes += candidate[2]
+            self._entries.move_to_end(session_id)
+            self._evict(candidate[1])
+
+    def update(self, session_id, **fields):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                raise KeyError(session_id)
+            # A new dict, so a rejected update leaves the stored session as it was
+            self.save(session_id, {**entry[0], **fields})
+
+    def delete(self, session_id):
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is not None:
+                self._total_bytes -= entry[2]
+
+    def exists(self, session_id):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return entry is not None and time.time() - entry[1] <= self.ttl_seconds
+
+    def __len__(self):
+        with self._lock:
+            self._evict(time.time())
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": type(self).__name__,
+                "sessions": len(self._entries),
+                "bytes": self._total_bytes,
+                "evictions": self._evictions,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a SQLite database in WAL mode, shareable by several worker processes.
+
+    Small state (history etc.) is stored as JSON text; portfolio and analysis
+    go in a separate zlib-compressed JSON blob that is only rewritten when
+    one of them changes.
+    """
+
+    def __init__(self, path=SESSION_DB_PATH, ttl_seconds=SESSION_TTL_SEC,
+                 max_sessions=SESSION_MAX_COUNT, max_history=SESSION_MAX_HISTORY):
+        self.path = os.path.abspath(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_history = max_history
+        self._local = threading.local()
+        self._next_evict = 0.0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY,"
+                " state TEXT NOT NULL,"
+                " payload BLOB,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _split(session):
+        state = {k: v for k, v in session.items() if k not in BLOB_FIELDS}
+        payload = {k: session.get(k) for k in BLOB_FIELDS}
+        return json.dumps(state, default=str), zlib.compress(json.dumps(payload, default=str).encode("utf-8"))
+
+    def get(self, session_id):
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            row = conn.execute(
+                "SELECT state, payload, updated_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > self.ttl_seconds:
+                conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                return None
+            conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id))
+        session = json.loads(row[0])
+        if row[1] is not None:
+            session.update(json.loads(zlib.decompress(row[1])))
+        return session
+
+    def save(self, session_id, session):
+        _trim_history(session, self.max_history)
+        state, payload = self._split(session)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO sessions (id, state, payload, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET state = excluded.state, payload = excluded.payload,"
+                " updated_at = excluded.updated_at",
+                (session_id, state, payload, time.time()),
+            )
+        self._evict()
+
+    def update(self, session_id, **fields):
+        conn = self._connect()
+        # BEGIN IMMEDIATE so concurrent workers can't interleave read-modify-write
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT state, payload FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                raise KeyError(session_id)
+            state = json.loads(row[0])
+            state.update({k: v for k, v in fields.items() if k not in BLOB_FIELDS})
+            _trim_history(state, self.max_history)
+            payload = row[1]
+            if any(k in BLOB_FIELDS for k in fields):
+                blobs = json.loads(zlib.decompress(payload)) if payload is not None else {}
+                blobs.update({k: v for k, v in fields.items() if k in BLOB_FIELDS})
+                payload = zlib.compress(json.dumps(blobs, default=str).encode("utf-8"))
+            conn.execute(
+                "UPDATE sessions SET state = ?, payload = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(state, default=str), payload, time.time(), session_id),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self):
+        now = time.time()
+        if now < self._next_evict:
+            return
+        self._next_evict = now + SESSION_EVICT_INTERVAL_SEC
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM sessions WHERE id IN ("
+                " SELECT id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            )
+
+    def delete(self, session_id):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def exists(self, session_id):
+        row = self._connect().execute(
+            "SELECT 1 FROM sessions WHERE id = ? AND updated_at >= ?", (session_id, time.time() - self.ttl_seconds)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM sessions WHERE updated_at >= ?", (time.time() - self.ttl_seconds,)
+        ).fetchone()
+        return row[0]
+
+    def stats(self):
+        row = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(state) + COALESCE(LENGTH(payload), 0)), 0) FROM sessions"
+            " WHERE updated_at >= ?",
+            (time.time() - self.ttl_seconds,),
+        ).fetchone()
+        return {
+            "backend": type(self).__name__,
+            "sessions": row[0],
+            "bytes": row[1],
+            "max_sessions": self.max_sessions,
+            "path": self.path,
+        }
+
+
+def create_session_store():
+    """Build the store selected by SESSION_STORE ("memory" or "sqlite")."""
+    if SESSION_STORE == "sqlite":
+        return SQLiteSessionStore()
+    if SESSION_STORE != "memory":
+        print(f"Unknown SESSION_STORE={SESSION_STORE!r}; using in-memory sessions")
+    return InMemorySessionStore()